@@ -1,10 +1,21 @@
-from typing import TypedDict
+import asyncio
+from typing import Any, Awaitable, TypedDict
 
 from bot.http import _request, _request_multipart
 from bot.errors import APIError
+from bot.cache import TTLCache, coalesce, key_fingerprint
 
 API_BASE_URL = "https://flavortown.hackclub.com"
 
+# max in-flight requests when fanning out over a user's projects
+PROJECT_FETCH_CONCURRENCY = 8
+
+# read responses cached per (key fingerprint, endpoint, ...) so repeat commands skip the round trip
+DEVLOG_CACHE_TTL_SECONDS = 60
+_DEVLOG_CACHE = TTLCache(maxsize=512, ttl=DEVLOG_CACHE_TTL_SECONDS)
+RESPONSE_CACHE_TTL_SECONDS = 60
+_RESPONSE_CACHE = TTLCache(maxsize=1024, ttl=RESPONSE_CACHE_TTL_SECONDS)
+
 
 class Pagination(TypedDict, total=False):
   total_pages: int
@@ -109,66 +120,126 @@ def _get_headers(api_key: str) -> dict[str, str]:
 
   return headers
 
-def get_users(api_key: str, page: int = 1, query: str | None = None) -> UsersResponse:
+async def _get_cached(
+    cache: TTLCache,
+    cache_key: tuple,
+    url: str,
+    api_key: str,
+    *,
+    params: dict | None = None,
+    action: str,
+    fresh: bool = False,
+):
+  """GET a Flavortown endpoint, serving and storing the response through `cache`.
+
+  With `fresh`, the request always goes to the API and only the result is cached.
+  """
+  if fresh:
+    data = await _get(url, api_key, params=params, action=action)
+  else:
+    cached = cache.get(cache_key)
+    if cached is not None:
+      return cached
+    data = await coalesce(cache_key, lambda: _get(url, api_key, params=params, action=action))
+  cache.set(cache_key, data)
+  return data
+
+def _get(url: str, api_key: str, *, params: dict | None = None, action: str) -> Awaitable[Any]:
+  return _request("GET", url, headers=_get_headers(api_key), params=params, action=action, service="flavortown", error_class=APIError)
+
+def _invalidate(cache: TTLCache, api_key: str) -> None:
+  """Drop everything `cache` holds for this key."""
+  fingerprint = key_fingerprint(api_key)
+  cache.discard_if(lambda k: k[0] == fingerprint)
+
+async def get_users(api_key: str, page: int = 1, query: str | None = None, *, fresh: bool = False) -> UsersResponse:
   url = f"{API_BASE_URL}/api/v1/users"
   params = {"page": page}
   if query:
     params["query"] = query
-  return _request("GET", url, headers=_get_headers(api_key), params=params, action="Fetch users", service="flavortown", error_class=APIError)
+  cache_key = (key_fingerprint(api_key), "users", page, query)
+  return await _get_cached(_RESPONSE_CACHE, cache_key, url, api_key, params=params, action="Fetch users", fresh=fresh)
   
-def get_user_by_id(api_key: str, user_id: int) -> UserSummary:
+async def get_user_by_id(api_key: str, user_id: int) -> UserSummary:
   url = f"{API_BASE_URL}/api/v1/users/{user_id}"
+  cache_key = (key_fingerprint(api_key), "user", user_id)
   try:
-    return _request("GET", url, headers=_get_headers(api_key), action="Fetch user", service="flavortown", error_class=APIError)
+    return await _get_cached(_RESPONSE_CACHE, cache_key, url, api_key, action="Fetch user")
   except APIError as e:
     if "status=404" in str(e):
       raise APIError(f"User with ID {user_id} not found!")
     raise
   
-def get_shop(api_key: str) -> list[ShopItem]:
+async def get_shop(api_key: str) -> list[ShopItem]:
   url = f"{API_BASE_URL}/api/v1/store"
-  return _request("GET", url, headers=_get_headers(api_key), action="Fetch shop", service="flavortown", error_class=APIError)
+  return await coalesce((key_fingerprint(api_key), "shop"), lambda: _get(url, api_key, action="Fetch shop"))
   
-def get_projects(api_key: str, page: int = 1, query: str | None = None) -> ProjectsResponse:
+async def get_projects(api_key: str, page: int = 1, query: str | None = None) -> ProjectsResponse:
   url = f"{API_BASE_URL}/api/v1/projects"
   params = {"page": page}
   if query:
     params["query"] = query
-  return _request("GET", url, headers=_get_headers(api_key), params=params, action="Fetch projects", service="flavortown", error_class=APIError)
+  inflight_key = (key_fingerprint(api_key), "projects", page, query)
+  return await coalesce(inflight_key, lambda: _get(url, api_key, params=params, action="Fetch projects"))
   
-def get_project_by_id(api_key: str, project_id: int) -> ProjectSummary:
+async def get_project_by_id(api_key: str, project_id: int) -> ProjectSummary:
   url = f"{API_BASE_URL}/api/v1/projects/{project_id}"
+  cache_key = (key_fingerprint(api_key), "project", project_id)
   try:
-    return _request("GET", url, headers=_get_headers(api_key), action="Fetch project", service="flavortown", error_class=APIError)
+    return await _get_cached(_RESPONSE_CACHE, cache_key, url, api_key, action="Fetch project")
   except APIError as e:
     if "status=404" in str(e):
       raise APIError(f"Project with ID {project_id} not found!")
     raise
 
-def get_self(api_key: str) -> UserSummary:
+async def get_projects_by_ids(api_key: str, project_ids: list[int]) -> dict[int, ProjectSummary]:
+  """
+  Fetch several projects and return them keyed by ID.
+
+  The API has no batch lookup, so this fans out over get_project_by_id
+  (deduplicated, at most PROJECT_FETCH_CONCURRENCY in flight). Projects that
+  fail to load are left out.
+  """
+  semaphore = asyncio.Semaphore(PROJECT_FETCH_CONCURRENCY)
+  unique_ids = list(dict.fromkeys(project_ids))
+
+  async def fetch(project_id: int) -> ProjectSummary | None:
+    async with semaphore:
+      try:
+        return await get_project_by_id(api_key, project_id)
+      except APIError:
+        return None
+
+  results = await asyncio.gather(*(fetch(pid) for pid in unique_ids))
+  return {pid: project for pid, project in zip(unique_ids, results) if project is not None}
+
+async def get_self(api_key: str, *, fresh: bool = False) -> UserSummary:
   url = f"{API_BASE_URL}/api/v1/users/me"
-  return _request("GET", url, headers=_get_headers(api_key), action="Fetch profile", service="flavortown", error_class=APIError)
+  cache_key = (key_fingerprint(api_key), "self")
+  return await _get_cached(_RESPONSE_CACHE, cache_key, url, api_key, action="Fetch profile", fresh=fresh)
 
-def get_project_devlogs(api_key: str, project_id: int, page: int = 1) -> ProjectDevlogsResponse:
+async def get_project_devlogs(api_key: str, project_id: int, page: int = 1) -> ProjectDevlogsResponse:
   url = f"{API_BASE_URL}/api/v1/projects/{project_id}/devlogs"
   params = {"page": page}
+  cache_key = (key_fingerprint(api_key), "project_devlogs", project_id, page)
   try:
-    return _request("GET", url, headers=_get_headers(api_key), params=params, action="Fetch devlogs", service="flavortown", error_class=APIError)
+    return await _get_cached(_DEVLOG_CACHE, cache_key, url, api_key, params=params, action="Fetch devlogs")
   except APIError as e:
     if "status=404" in str(e):
       raise APIError(f"Project with ID {project_id} not found!")
     raise
 
-def list_devlogs(api_key: str, page: int = 1) -> DevlogListResponse:
+async def list_devlogs(api_key: str, page: int = 1) -> DevlogListResponse:
   url = f"{API_BASE_URL}/api/v1/devlogs"
   params = {"page": page}
-  return _request("GET", url, headers=_get_headers(api_key), params=params, action="List devlogs", service="flavortown", error_class=APIError)
+  cache_key = (key_fingerprint(api_key), "devlogs", page)
+  return await _get_cached(_DEVLOG_CACHE, cache_key, url, api_key, params=params, action="List devlogs")
 
-def get_devlog_by_id(api_key: str, devlog_id: int) -> DevlogDetailResponse:
+async def get_devlog_by_id(api_key: str, devlog_id: int) -> DevlogDetailResponse:
   url = f"{API_BASE_URL}/api/v1/devlogs/{devlog_id}"
-  return _request("GET", url, headers=_get_headers(api_key), action="Fetch devlog", service="flavortown", error_class=APIError)
+  return await _request("GET", url, headers=_get_headers(api_key), action="Fetch devlog", service="flavortown", error_class=APIError)
 
-def create_project(
+async def create_project(
     api_key: str,
     title: str,
     description: str | None = None,
@@ -182,9 +253,11 @@ def create_project(
   if repo_url: payload["repo_url"] = repo_url
   if demo_url: payload["demo_url"] = demo_url
   if readme_url: payload["readme_url"] = readme_url
-  return _request("POST", url, headers=_get_headers(api_key), json=payload, action="Create project", service="flavortown", error_class=APIError)
+  created = await _request("POST", url, headers=_get_headers(api_key), json=payload, action="Create project", service="flavortown", error_class=APIError)
+  _invalidate(_RESPONSE_CACHE, api_key)
+  return created
 
-def update_project(
+async def update_project(
     api_key: str,
     project_id: int,
     title: str | None = None,
@@ -202,9 +275,11 @@ def update_project(
   if readme_url: payload["readme_url"] = readme_url
   if not payload:
     raise APIError("No fields provided for update.")
-  return _request("PATCH", url, headers=_get_headers(api_key), json=payload, action="Update project", service="flavortown", error_class=APIError)
+  updated = await _request("PATCH", url, headers=_get_headers(api_key), json=payload, action="Update project", service="flavortown", error_class=APIError)
+  _invalidate(_RESPONSE_CACHE, api_key)
+  return updated
 
-def create_devlog(
+async def create_devlog(
     api_key: str,
     project_id: int,
     body: str,
@@ -214,10 +289,13 @@ def create_devlog(
   payload: DevlogCreatePayload = {"body": body}
   if media_urls:
     payload["media_urls"] = media_urls
-  return _request("POST", url, headers=_get_headers(api_key), json=payload, action="Create devlog", service="flavortown", error_class=APIError)
+  created = await _request("POST", url, headers=_get_headers(api_key), json=payload, action="Create devlog", service="flavortown", error_class=APIError)
+  _invalidate(_DEVLOG_CACHE, api_key)
+  _invalidate(_RESPONSE_CACHE, api_key)
+  return created
 
 
-def create_devlog_with_attachments(
+async def create_devlog_with_attachments(
     api_key: str,
     project_id: int,
     body: str,
@@ -240,7 +318,7 @@ def create_devlog_with_attachments(
   headers = _get_headers(api_key)
   headers.pop("Content-Type", None)
 
-  return _request_multipart(
+  created = await _request_multipart(
     "POST",
     url,
     headers=headers,
@@ -249,4 +327,7 @@ def create_devlog_with_attachments(
     action="Create devlog",
     service="flavortown",
     error_class=APIError,
-  )
\ No newline at end of file
+  )
+  _invalidate(_DEVLOG_CACHE, api_key)
+  _invalidate(_RESPONSE_CACHE, api_key)
+  return created
\ No newline at end of file
@@ -1,6 +1,7 @@
 import discord
 from discord.ext import commands
 from bot.config import GUILD_ID
+from bot.http import close_session
 
 import logging
 logger = logging.getLogger(__name__)
@@ -34,6 +35,10 @@ class JF(commands.Bot):
       await self.tree.sync()
       logger.info("event=slash_sync scope=global")
 
+  async def close(self) -> None:
+    await close_session()
+    await super().close()
+
   async def on_ready(self):
     logger.info("event=ready user=%s user_id=%s", self.user, self.user.id)
     logger.info("event=guild_count count=%s", len(self.guilds))
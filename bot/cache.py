@@ -0,0 +1,76 @@
+"""
+Small in-process caches for upstream API responses.
+
+Entries are keyed by a fingerprint of the user's API key, never the key
+itself, so one user's cached data is never served to another.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+
+# requests currently on the wire, by cache key, so concurrent identical calls share one
+_INFLIGHT: dict[Hashable, asyncio.Future] = {}
+
+
+def key_fingerprint(api_key: str) -> bytes:
+    """Return a short, non-reversible identifier for an API key."""
+    return hashlib.blake2s(api_key.encode(), digest_size=16).digest()
+
+
+async def coalesce(key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+    """Await `fetch()`, or the identical request another caller already has in flight.
+
+    The request runs as its own task and each caller awaits it through a shield,
+    so one caller being cancelled doesn't cancel it for the others.
+    """
+    task = _INFLIGHT.get(key)
+    if task is None:
+        task = asyncio.ensure_future(fetch())
+        _INFLIGHT[key] = task
+        task.add_done_callback(lambda _: _INFLIGHT.pop(key, None))
+    return await asyncio.shield(task)
+
+
+class TTLCache:
+    """Bounded LRU mapping whose entries expire `ttl` seconds after being set."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires, value = entry
+        if time.monotonic() >= expires:
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def discard_if(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop every entry whose key matches `predicate` and return how many were removed."""
+        stale = [key for key in self._data if predicate(key)]
+        for key in stale:
+            del self._data[key]
+        return len(stale)
+
+    def clear(self) -> None:
+        self._data.clear()
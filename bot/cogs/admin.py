@@ -1,5 +1,4 @@
 import sqlite3
-from pathlib import Path
 
 import discord
 from discord import app_commands
@@ -8,9 +7,12 @@ from discord.ext import commands
 from bot.config import ADMIN_USER_IDS
 from bot.cogs.login import clear_all_sessions
 from bot.http import get_http_stats, reset_http_stats
+from bot.storage import DB_PATH
 from bot.utils import send_error
 from bot.demo import is_demo_mode, set_demo_mode, get_demo_api_key
 
+_COLOR_BLURPLE = discord.Color.blurple()
+
 
 class Admin(commands.Cog):
     """Admin tools."""
@@ -55,7 +57,7 @@ class Admin(commands.Cog):
         error_calls = stats["error_calls"]
         error_rate = (error_calls / total_calls * 100) if total_calls else 0.0
 
-        embed = discord.Embed(title="API Stats", color=discord.Color.blurple())
+        embed = discord.Embed(title="API Stats", color=_COLOR_BLURPLE)
         embed.add_field(name="Total calls", value=str(total_calls), inline=True)
         embed.add_field(name="Error calls", value=str(error_calls), inline=True)
         embed.add_field(name="Error rate", value=f"{error_rate:.2f}%", inline=True)
@@ -84,13 +86,12 @@ class Admin(commands.Cog):
             await send_error(interaction, "You don't have permission to use this command.")
             return
 
-        db_path = Path(__file__).resolve().parents[2] / "data" / "keys.db"
-        if not db_path.exists():
+        if not DB_PATH.exists():
             await send_error(interaction, "DB not found.")
             return
 
         try:
-            with sqlite3.connect(str(db_path)) as conn:
+            with sqlite3.connect(DB_PATH) as conn:
                 conn.execute("VACUUM")
             await interaction.response.send_message("DB vacuum completed.", ephemeral=True)
         except sqlite3.Error:
@@ -9,6 +9,8 @@ from bot.utils import send_error, parse_media_urls, require_non_empty, clamp_pag
 from bot.demo import is_demo_mode
 from bot.cogs.views import DevlogListView, ProjectDevlogListView
 
+_COLOR_BLUE = discord.Color.blue()
+
 
 class Devlogs(commands.Cog):
     """Devlog commands."""
@@ -29,12 +31,15 @@ class Devlogs(commands.Cog):
             return
 
         try:
-            data = list_devlogs(api_key, page=page)
+            data = await list_devlogs(api_key, page=page)
             pagination = data.get("pagination", {})
             total_pages = pagination.get("total_pages", 1) or 1
+            requested_page = page
             page = clamp_page(page, total_pages)
 
             view = DevlogListView(api_key, page, total_pages)
+            if pagination.get("current_page", requested_page) == page:
+                view.remember_page(page, data)
             embed = await view.get_embed(page)
 
             if total_pages <= 1:
@@ -57,16 +62,16 @@ class Devlogs(commands.Cog):
             return
 
         try:
-            data = get_devlog_by_id(api_key, devlog_id)
+            data = await get_devlog_by_id(api_key, devlog_id)
             devlog = data.get("devlog") or {}
 
-            body = (devlog.get("body") or "").strip()
+            body = (devlog.get("body") or "").strip() or "No body"
             scrapbook = devlog.get("scrapbook_url")
 
             embed = discord.Embed(
                 title=f"Devlog {devlog_id}",
-                description=body or "No body",
-                color=discord.Color.blue()
+                description=body,
+                color=_COLOR_BLUE
             )
 
             if scrapbook:
@@ -89,12 +94,15 @@ class Devlogs(commands.Cog):
             return
 
         try:
-            data = get_project_devlogs(api_key, project_id, page=page)
+            data = await get_project_devlogs(api_key, project_id, page=page)
             pagination = data.get("pagination", {})
             total_pages = pagination.get("total_pages", 1) or 1
+            requested_page = page
             page = clamp_page(page, total_pages)
 
             view = ProjectDevlogListView(api_key, project_id, page, total_pages)
+            if pagination.get("current_page", requested_page) == page:
+                view.remember_page(page, data)
             embed = await view.get_embed(page)
 
             if total_pages <= 1:
@@ -146,7 +154,7 @@ class Devlogs(commands.Cog):
                     content_type = attachment.content_type or "application/octet-stream"
                     file_payloads.append((attachment.filename, content, content_type))
 
-            created = create_devlog_with_attachments(
+            created = await create_devlog_with_attachments(
                 api_key,
                 project_id,
                 body,
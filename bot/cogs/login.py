@@ -5,25 +5,39 @@ Users encrypt their API keys with a personal password. The bot stores only
 the encrypted version, ensuring that even the bot operator cannot read keys.
 """
 
+import asyncio
 import time
+import hmac
 import json
 import functools
+from dataclasses import dataclass, field
 
 import discord
 from discord import app_commands
 from discord.ext import commands, tasks
-import requests
 
-from bot.crypto import encrypt_api_key, decrypt_api_key
+from bot.crypto import encrypt_api_key, decrypt_api_key, clear_derived_key_cache, forget_derived_keys
 from bot.storage import store_encrypted_key, get_encrypted_key, delete_user_key, user_has_key
-from bot.errors import StorageError
+from bot.errors import APIError, HackatimeError, StorageError
 from bot.utils import send_error
-from bot.api import API_BASE_URL
+from bot.api import get_self, get_users
+from bot.hackatime import get_time_today
 from bot.demo import is_demo_mode, get_demo_api_key
 
+
+@dataclass(slots=True)
+class Session:
+    """A decrypted API key held in memory for one user and service."""
+    key: str = field(repr=False)
+    metadata: dict = field(default_factory=dict)
+    expires: float = 0.0
+    # salt of the stored key, so its cached derived key can be dropped with the session
+    salt: str | None = field(default=None, repr=False)
+
+
 # keys stored only in ram
-# SESSION_CACHE[user_id] = { "flavortown": { "key": ..., "expires": ... }, "hackatime": ... }
-SESSION_CACHE: dict[int, dict] = {}
+# SESSION_CACHE[user_id] = { "flavortown": Session(...), "hackatime": Session(...) }
+SESSION_CACHE: dict[int, dict[str, Session]] = {}
 SESSION_CACHE_MAX_SIZE = 500
 SESSION_CACHE_TTL_SECONDS = 7200
 
@@ -49,18 +63,18 @@ class BaseLoginModal(discord.ui.Modal):
     )
 
     async def do_encryption_and_store(self, interaction: discord.Interaction, api_key: str, service: str, metadata: dict = None):
-        if self.password.value != self.password_confirm.value:
+        if not hmac.compare_digest(self.password.value.encode(), self.password_confirm.value.encode()):
             await interaction.response.send_message(
                 "Passwords don't match! Please try again.",
                 ephemeral=True
             )
             return
         
-        encrypted_key, salt = encrypt_api_key(api_key, self.password.value)
+        encrypted_key, salt = await asyncio.to_thread(encrypt_api_key, api_key, self.password.value)
         
         meta_str = json.dumps(metadata) if metadata else None
         try:
-            store_encrypted_key(interaction.user.id, service, encrypted_key, salt, meta_str)
+            await asyncio.to_thread(store_encrypted_key, interaction.user.id, service, encrypted_key, salt, meta_str)
         except StorageError:
             await send_error(interaction, "Storage error. Please try again in a moment.")
             return
@@ -84,18 +98,15 @@ class FlavortownLoginModal(BaseLoginModal, title="Login to Flavortown"):
     
     async def on_submit(self, interaction: discord.Interaction):
         try:
-            headers = {
-                "Authorization": f"Bearer {self.api_key.value}",
-                "Content-Type": "application/json",
-                "X-Flavortown-Ext-9378": "true"
-            }
-            response = requests.get(f"{API_BASE_URL}/api/v1/users/me", headers=headers, timeout=10)
-            if response.status_code == 404:
-                 response = requests.get(f"{API_BASE_URL}/api/v1/users", headers=headers, timeout=10)
-
-            response.raise_for_status()
-        except requests.RequestException as e:
-            if isinstance(e, requests.HTTPError) and e.response.status_code == 401:
+            # always ask the API; a cached response could vouch for a key revoked since
+            try:
+                await get_self(self.api_key.value, fresh=True)
+            except APIError as e:
+                if "status=404" not in str(e):
+                    raise
+                await get_users(self.api_key.value, fresh=True)
+        except APIError as e:
+            if "status=401" in str(e):
                 await interaction.response.send_message("Invalid API key! Please check your key and try again.", ephemeral=True)
             else:
                 await interaction.response.send_message(f"Could not verify API key: {str(e)}", ephemeral=True)
@@ -123,17 +134,14 @@ class HackatimeLoginModal(BaseLoginModal, title="Login to Hackatime"):
     
     async def on_submit(self, interaction: discord.Interaction):
         try:
-            headers = {"Authorization": f"Bearer {self.api_key.value}"}
-            url = "https://hackatime.hackclub.com/api/hackatime/v1/users/current/statusbar/today"
-            response = requests.get(url, headers=headers, timeout=10)
-            
-            if response.status_code == 401:
+            # always ask the API; a cached response could vouch for a key revoked since
+            await get_time_today(self.api_key.value, fresh=True)
+        except HackatimeError as e:
+            if "status=401" in str(e):
                 await interaction.response.send_message("Invalid API key! Please check your key and try again.", ephemeral=True)
-                return
-            response.raise_for_status()
-        except requests.RequestException as e:
-             await interaction.response.send_message(f"Could not verify API key: {str(e)}", ephemeral=True)
-             return
+            else:
+                await interaction.response.send_message(f"Could not verify API key: {str(e)}", ephemeral=True)
+            return
 
         await self.do_encryption_and_store(
             interaction, 
@@ -155,6 +163,7 @@ class UnlockModal(discord.ui.Modal, title="Unlock API Access"):
     )
     
     def __init__(self, callback, service: str = "flavortown", cache_key: bool = True):
+        """`callback` is awaited as callback(interaction, api_key) once the key is decrypted."""
         super().__init__()
         self._callback = callback
         self._service = service
@@ -163,24 +172,34 @@ class UnlockModal(discord.ui.Modal, title="Unlock API Access"):
     async def on_submit(self, interaction: discord.Interaction):
         # attempt to decrypt the key
         try:
-            stored = get_encrypted_key(interaction.user.id, self._service)
+            stored = await asyncio.to_thread(get_encrypted_key, interaction.user.id, self._service)
         except StorageError:
             await send_error(interaction, "Storage error. Please try again in a moment.")
             return
-        if stored:
-            encrypted_key, salt, metadata = stored
-            decrypted_key = decrypt_api_key(encrypted_key, salt, self.password.value)
-            if decrypted_key and self._cache_key:
-                cleanup_expired_sessions()
-                evict_if_needed()
-                if interaction.user.id not in SESSION_CACHE:
-                    SESSION_CACHE[interaction.user.id] = {}
-                SESSION_CACHE[interaction.user.id][self._service] = {
-                    "key": decrypted_key,
-                    "metadata": json.loads(metadata) if metadata else {},
-                    "expires": time.time() + SESSION_CACHE_TTL_SECONDS
-                }
-        await self._callback(interaction, self.password.value)
+        if not stored:
+            await interaction.response.send_message(
+                f"You need to log in to **{self._service.title()}** first! Use `/login`.",
+                ephemeral=True
+            )
+            return
+
+        encrypted_key, salt, metadata = stored
+        decrypted_key = await asyncio.to_thread(decrypt_api_key, encrypted_key, salt, self.password.value)
+        if not decrypted_key:
+            await interaction.response.send_message(
+                "Incorrect password! Please try again.",
+                ephemeral=True
+            )
+            return
+
+        if self._cache_key:
+            cache_session(interaction.user.id, self._service, decrypted_key, metadata, salt)
+        try:
+            await self._callback(interaction, decrypted_key)
+        finally:
+            if not self._cache_key:
+                # one-off use without a session; don't keep anything derived from it around
+                forget_derived_keys(salt)
 
 
 class Login(commands.Cog):
@@ -222,7 +241,7 @@ class Login(commands.Cog):
         tgt = service.value if service.value != "all" else None
         
         try:
-            if delete_user_key(interaction.user.id, tgt):
+            if await asyncio.to_thread(delete_user_key, interaction.user.id, tgt):
                 await interaction.response.send_message(
                     f"Your API key(s) for {service.name} have been deleted and session cleared.",
                     ephemeral=True
@@ -239,8 +258,8 @@ class Login(commands.Cog):
     async def status(self, interaction: discord.Interaction):
         """Check if the user has a stored key."""
         try:
-            ft = user_has_key(interaction.user.id, "flavortown")
-            ht = user_has_key(interaction.user.id, "hackatime")
+            ft = await asyncio.to_thread(user_has_key, interaction.user.id, "flavortown")
+            ht = await asyncio.to_thread(user_has_key, interaction.user.id, "hackatime")
         except StorageError:
             await send_error(interaction, "Storage error. Please try again in a moment.")
             return
@@ -262,10 +281,16 @@ async def setup(bot: commands.Bot):
     await bot.add_cog(Login(bot))
 
 
+def _drop_sessions(sessions) -> None:
+    """Forget the cached secrets behind sessions that were just removed."""
+    for session in sessions:
+        if session.salt:
+            forget_derived_keys(session.salt)
+
 def clear_user_session(user_id: int) -> bool:
     """Clear a user's session from the cache."""
     if user_id in SESSION_CACHE:
-        del SESSION_CACHE[user_id]
+        _drop_sessions(SESSION_CACHE.pop(user_id).values())
         return True
     return False
 
@@ -274,21 +299,23 @@ def clear_all_sessions() -> int:
     """Clear all cached sessions and return number removed."""
     total = sum(len(services) for services in SESSION_CACHE.values())
     SESSION_CACHE.clear()
+    clear_derived_key_cache()
     return total
 
 def cleanup_expired_sessions() -> int:
     """Remove expired sessions and return count removed."""
     now = time.time()
-    removed = 0
+    removed = []
     for user_id in list(SESSION_CACHE.keys()):
         services = SESSION_CACHE[user_id]
         for service in list(services.keys()):
-            if now >= services[service]["expires"]:
-                del services[service]
-                removed += 1
+            if now >= services[service].expires:
+                removed.append(services.pop(service))
         if not services:
             del SESSION_CACHE[user_id]
-    return removed
+    if removed:
+        _drop_sessions(removed)
+    return len(removed)
 
 def evict_if_needed() -> None:
     """Evict oldest sessions if cache exceeds max size."""
@@ -302,78 +329,89 @@ def evict_if_needed() -> None:
     entries = []
     for user_id, services in SESSION_CACHE.items():
         for service, session in services.items():
-            entries.append((session["expires"], user_id, service))
+            entries.append((session.expires, user_id, service))
     
     entries.sort(key=lambda x: x[0])
 
     idx = 0
+    evicted = []
     while total > SESSION_CACHE_MAX_SIZE and idx < len(entries):
         _, user_id, service = entries[idx]
         if user_id in SESSION_CACHE and service in SESSION_CACHE[user_id]:
-            del SESSION_CACHE[user_id][service]
+            evicted.append(SESSION_CACHE[user_id].pop(service))
             total -= 1
             if not SESSION_CACHE[user_id]:
                 del SESSION_CACHE[user_id]
         idx += 1
+    if evicted:
+        _drop_sessions(evicted)
+
+def cache_session(user_id: int, service: str, key: str, metadata: str | None, salt: str | None = None) -> Session:
+    """Cache a decrypted key for a user and service."""
+    cleanup_expired_sessions()
+    evict_if_needed()
+    session = Session(
+        key=key,
+        metadata=json.loads(metadata) if metadata else {},
+        expires=time.time() + SESSION_CACHE_TTL_SECONDS,
+        salt=salt,
+    )
+    SESSION_CACHE.setdefault(user_id, {})[service] = session
+    return session
+
+def get_cached_session(user_id: int, service: str) -> Session | None:
+    """Return the user's unexpired session for a service, extending its TTL."""
+    services = SESSION_CACHE.get(user_id)
+    session = services.get(service) if services else None
+    if session is None:
+        return None
+    now = time.time()
+    if now < session.expires:
+        session.expires = now + SESSION_CACHE_TTL_SECONDS
+        return session
+    del services[service]
+    if not services:
+        del SESSION_CACHE[user_id]
+    _drop_sessions((session,))
+    return None
 
 async def get_api_key_for_user(
     interaction: discord.Interaction,
-    password: str | None = None,
     service: str = "flavortown"
 ) -> str | None:
     """
-    Attempt to get a user's API key from cache or decrypt it.
+    Get a user's API key from their unlocked session (never touches storage).
     """
     if is_demo_mode():
         return get_demo_api_key(service)
 
-    user_id = interaction.user.id
-    
-    if user_id in SESSION_CACHE and service in SESSION_CACHE[user_id]:
-        session = SESSION_CACHE[user_id][service]
-        if time.time() < session["expires"]:
-            session["expires"] = time.time() + SESSION_CACHE_TTL_SECONDS
-            return session["key"]
-        else:
-            del SESSION_CACHE[user_id][service]
-            if not SESSION_CACHE[user_id]:
-                del SESSION_CACHE[user_id]
-    
-    if password is None:
-        return None
-    
-    stored = get_encrypted_key(user_id, service)
-    if not stored:
-        return None
-    
-    encrypted_key, salt, metadata = stored
-    decrypted_key = decrypt_api_key(encrypted_key, salt, password)
-    
-    if decrypted_key:
-        cleanup_expired_sessions()
-        evict_if_needed()
-        if user_id not in SESSION_CACHE:
-            SESSION_CACHE[user_id] = {}
-        SESSION_CACHE[user_id][service] = {
-            "key": decrypted_key,
-            "metadata": json.loads(metadata) if metadata else {},
-            "expires": time.time() + SESSION_CACHE_TTL_SECONDS
-        }
-    
-    return decrypted_key
+    session = get_cached_session(interaction.user.id, service)
+    return session.key if session else None
 
 async def get_user_metadata(interaction: discord.Interaction, service: str):
     user_id = interaction.user.id
     if user_id in SESSION_CACHE and service in SESSION_CACHE[user_id]:
-        return SESSION_CACHE[user_id][service].get("metadata", {})
+        return SESSION_CACHE[user_id][service].metadata
     
-    stored = get_encrypted_key(user_id, service)
+    stored = await asyncio.to_thread(get_encrypted_key, user_id, service)
     if stored:
         _, _, metadata = stored
         if metadata:
             return json.loads(metadata)
     return {}
 
+async def _on_password(
+    func,
+    self,
+    modal_interaction: discord.Interaction,
+    api_key: str,
+    *,
+    args: tuple,
+    kwargs: dict,
+):
+    """Unlock callback used by `require_auth`; bound per command via functools.partial."""
+    await func(self, modal_interaction, *args, **kwargs)
+
 def require_auth(service="flavortown"):
     """
     Decorator for commands that require API authentication.
@@ -381,9 +419,16 @@ def require_auth(service="flavortown"):
     def decorator(func):
         @functools.wraps(func)
         async def wrapper(self, interaction: discord.Interaction, *args, **kwargs):
+            # an unlocked session (or demo mode) answers without touching storage;
+            # the key table is only checked when the user will have to unlock
+            key = await get_api_key_for_user(interaction, service)
+            if key:
+                await func(self, interaction, *args, **kwargs)
+                return
+
             if not is_demo_mode():
                 try:
-                    if not user_has_key(interaction.user.id, service):
+                    if not await asyncio.to_thread(user_has_key, interaction.user.id, service):
                         await interaction.response.send_message(
                             f"You need to log in to **{service.title()}** first! Use `/login`.",
                             ephemeral=True
@@ -392,31 +437,10 @@ def require_auth(service="flavortown"):
                 except StorageError:
                     await send_error(interaction, "Storage error. Please try again in a moment.")
                     return
-            
-            async def on_password(modal_interaction: discord.Interaction, password: str):
-                try:
-                    api_key = await get_api_key_for_user(modal_interaction, password, service)
-                except StorageError:
-                    await send_error(modal_interaction, "Storage error. Please try again in a moment.")
-                    return
-                if not api_key:
-                    await modal_interaction.response.send_message(
-                        "Incorrect password! Please try again.",
-                        ephemeral=True
-                    )
-                    return
-                await func(self, modal_interaction, *args, **kwargs)
-            
-            try:
-                key = await get_api_key_for_user(interaction, None, service)
-            except StorageError:
-                await send_error(interaction, "Storage error. Please try again in a moment.")
-                return
-            if key:
-                await func(self, interaction, *args, **kwargs)
-            else:
-                modal = UnlockModal(on_password, service=service)
-                await interaction.response.send_modal(modal)
+
+            on_password = functools.partial(_on_password, func, self, args=args, kwargs=kwargs)
+            modal = UnlockModal(on_password, service=service)
+            await interaction.response.send_modal(modal)
         
         return wrapper
     return decorator
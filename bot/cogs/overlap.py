@@ -1,4 +1,7 @@
+import asyncio
 import random
+from typing import Sequence
+
 import discord
 from discord import app_commands
 from discord.ext import commands
@@ -6,15 +9,55 @@ from discord.ext import commands
 from bot.cogs.login import require_auth, get_api_key_for_user
 from bot.api import get_users, get_user_by_id, get_self
 from bot.errors import APIError, StorageError
-from bot.utils import format_seconds, send_error
+from bot.utils import add_fields, format_seconds, send_error
+
+
+_COLOR_ORANGE = discord.Color.orange()
 
+# (label, value formatter) for each compared stat, in display order
+_OVERLAP_FIELDS = (
+    ("🍪 Cookies", str),
+    ("Total Devlog Time", format_seconds),
+    ("Devlog Time Today", format_seconds),
+    ("Projects", str),
+)
 
-def compare_bar(you: int, them: int, width: int = 10) -> str:
+BAR_WIDTH = 10
+# every possible bar at the default width, indexed by number of green blocks
+_BARS = tuple("🟩" * i + "🟥" * (BAR_WIDTH - i) for i in range(BAR_WIDTH + 1))
+_EVEN_BAR = "▓" * (BAR_WIDTH // 2) + "░" * (BAR_WIDTH // 2)
+
+
+def _user_stats(data: dict) -> tuple[int, int, int, int]:
+    """Values compared by /overlap, in _OVERLAP_FIELDS order."""
+    get = data.get
+    return (
+        get("cookies") or 0,
+        get("devlog_seconds_total") or 0,
+        get("devlog_seconds_today") or 0,
+        len(get("project_ids") or ()),
+    )
+
+
+def score_matchup(mine: Sequence[int], theirs: Sequence[int]) -> tuple[int, int]:
+    """Count the stats each side leads on; ties score for neither."""
+    my_wins = their_wins = 0
+    for m, t in zip(mine, theirs):
+        if m > t:
+            my_wins += 1
+        elif t > m:
+            their_wins += 1
+    return my_wins, their_wins
+
+
+def compare_bar(you: int, them: int, width: int = BAR_WIDTH) -> str:
     """Create a visual comparison bar."""
     total = you + them
     if total == 0:
-        return "▓" * (width // 2) + "░" * (width // 2)
+        return _EVEN_BAR if width == BAR_WIDTH else "▓" * (width // 2) + "░" * (width // 2)
     you_blocks = round((you / total) * width)
+    if width == BAR_WIDTH and 0 <= you_blocks <= width:
+        return _BARS[you_blocks]
     them_blocks = width - you_blocks
     return "🟩" * you_blocks + "🟥" * them_blocks
 
@@ -40,80 +83,46 @@ class Overlap(commands.Cog):
             return
 
         try:
-            my_data = get_self(api_key)
+            random_page = random.randint(1, 10)
+            my_data, users_data = await asyncio.gather(
+                get_self(api_key),
+                get_users(api_key, page=random_page),
+            )
             my_name = my_data.get("display_name", "You")
-            my_cookies = my_data.get("cookies") or 0
-            my_total_time = my_data.get("devlog_seconds_total") or 0
-            my_today_time = my_data.get("devlog_seconds_today") or 0
-            my_projects = len(my_data.get("project_ids", []))
             my_id = my_data.get("id")
+            mine = _user_stats(my_data)
             
-            random_page = random.randint(1, 10)
-            users_data = get_users(api_key, page=random_page)
             users_list = users_data.get("users", [])
             
             if not users_list:
                 await send_error(interaction, "Could not find any users to compare with!")
                 return
             
-            other_users = [u for u in users_list if u.get("id") != my_id]
-            if not other_users:
-                other_users = users_list
-            
-            random_user = random.choice(other_users)
+            # pick uniformly among everyone but ourselves without building a filtered list:
+            # on hitting our own entry, step 1..n-1 places further, which never lands on it again
+            count = len(users_list)
+            index = random.randrange(count)
+            if count > 1 and users_list[index].get("id") == my_id:
+                index = (index + 1 + random.randrange(count - 1)) % count
+            random_user = users_list[index]
             
-            their_data = get_user_by_id(api_key, random_user.get("id"))
+            their_data = await get_user_by_id(api_key, random_user.get("id"))
             their_name = their_data.get("display_name", "Unknown")
-            their_cookies = their_data.get("cookies") or 0
-            their_total_time = their_data.get("devlog_seconds_total") or 0
-            their_today_time = their_data.get("devlog_seconds_today") or 0
-            their_projects = len(their_data.get("project_ids", []))
             their_avatar = their_data.get("avatar")
+            theirs = _user_stats(their_data)
             
             embed = discord.Embed(
                 title=f"{my_name} vs {their_name}",
                 description="Who's been grinding harder?",
-                color=discord.Color.orange()
-            )
-            
-            cookie_bar = compare_bar(my_cookies, their_cookies)
-            embed.add_field(
-                name="🍪 Cookies",
-                value=f"**{my_cookies}** {cookie_bar} **{their_cookies}**",
-                inline=False
+                color=_COLOR_ORANGE
             )
             
-            time_bar = compare_bar(my_total_time, their_total_time)
-            embed.add_field(
-                name="Total Devlog Time",
-                value=f"**{format_seconds(my_total_time)}** {time_bar} **{format_seconds(their_total_time)}**",
-                inline=False
-            )
-            
-            today_bar = compare_bar(my_today_time, their_today_time)
-            embed.add_field(
-                name="Devlog Time Today",
-                value=f"**{format_seconds(my_today_time)}** {today_bar} **{format_seconds(their_today_time)}**",
-                inline=False
-            )
-            
-            proj_bar = compare_bar(my_projects, their_projects)
-            embed.add_field(
-                name="Projects",
-                value=f"**{my_projects}** {proj_bar} **{their_projects}**",
-                inline=False
-            )
+            add_fields(embed, (
+                (label, f"**{fmt(m)}** {compare_bar(m, t)} **{fmt(t)}**")
+                for (label, fmt), m, t in zip(_OVERLAP_FIELDS, mine, theirs)
+            ))
             
-            your_score = 0
-            their_score = 0
-            if my_cookies > their_cookies: your_score += 1
-            elif their_cookies > my_cookies: their_score += 1
-            if my_total_time > their_total_time: your_score += 1
-            elif their_total_time > my_total_time: their_score += 1
-            if my_today_time > their_today_time: your_score += 1
-            elif their_today_time > my_today_time: their_score += 1
-            if my_projects > their_projects: your_score += 1
-            elif their_projects > my_projects: their_score += 1
+            your_score, their_score = score_matchup(mine, theirs)
             
             if your_score > their_score:
                 result = f"🏆 **{my_name}** wins! ({your_score}-{their_score})"
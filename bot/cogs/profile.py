@@ -1,3 +1,6 @@
+import asyncio
+from bisect import bisect_right
+
 import discord
 from discord import app_commands
 from discord.ext import commands
@@ -5,9 +8,23 @@ from discord.ext import commands
 from bot.cogs.login import UnlockModal, get_api_key_for_user
 from bot.demo import is_demo_mode
 from bot.storage import user_has_key
-from bot.api import get_self, get_project_by_id
+from bot.api import get_self, get_projects_by_ids
 from bot.errors import APIError, StorageError
-from bot.utils import format_seconds, send_error
+from bot.utils import add_fields, format_seconds, send_error
+
+_COLOR_ORANGE = discord.Color.orange()
+
+# rank tiers, ascending by the score needed to reach them
+_TIER_THRESHOLDS = (0, 25, 75, 150, 300)
+_TIER_NAMES = ("Street Taco", "Food Truck", "Flame Griller", "Sauce Boss", "Mayor of Flavortown")
+
+PROGRESS_BAR_LENGTH = 10
+# every possible progress bar at the default length, indexed by filled cells
+_PROGRESS_BARS = tuple("█" * i + "░" * (PROGRESS_BAR_LENGTH - i) for i in range(PROGRESS_BAR_LENGTH + 1))
+
+
+def _devlog_count(project: dict) -> int:
+    return len(project.get("devlog_ids") or ())
 
 
 class Profile(commands.Cog):
@@ -16,31 +33,22 @@ class Profile(commands.Cog):
 
     def _flavor_rank(self, cookies: int, devlog_seconds_total: int) -> tuple[str, int, int]:
         score = max(0, cookies) + max(0, devlog_seconds_total // 3600)
-        tiers = [
-            (0, "Street Taco"),
-            (25, "Food Truck"),
-            (75, "Flame Griller"),
-            (150, "Sauce Boss"),
-            (300, "Mayor of Flavortown"),
-        ]
-        current = tiers[0]
-        next_tier = None
-        for i, tier in enumerate(tiers):
-            if score >= tier[0]:
-                current = tier
-                next_tier = tiers[i + 1] if i + 1 < len(tiers) else None
-        return current[1], score, (next_tier[0] if next_tier else current[0])
-
-    def _progress_bar(self, value: int, max_value: int, length: int = 10) -> str:
+        i = max(0, bisect_right(_TIER_THRESHOLDS, score) - 1)
+        next_threshold = _TIER_THRESHOLDS[i + 1] if i + 1 < len(_TIER_THRESHOLDS) else _TIER_THRESHOLDS[i]
+        return _TIER_NAMES[i], score, next_threshold
+
+    def _progress_bar(self, value: int, max_value: int, length: int = PROGRESS_BAR_LENGTH) -> str:
         if max_value <= 0:
             return "░" * length
         filled = int(min(length, (value / max_value) * length))
+        if length == PROGRESS_BAR_LENGTH and filled >= 0:
+            return _PROGRESS_BARS[filled]
         return "█" * filled + "░" * (length - filled)
 
     async def _show_profile(self, interaction: discord.Interaction, api_key: str):
         """Display a rich profile embed using the provided API key."""
         try:
-            data = get_self(api_key)
+            data = await get_self(api_key)
 
             name = data.get("display_name") or "Unknown"
             cookies = data.get("cookies") if data.get("cookies") is not None else 0
@@ -56,38 +64,24 @@ class Profile(commands.Cog):
             embed = discord.Embed(
                 title=f"🍔 {name}'s Flavortown Profile",
                 description=f"Rank: **{rank}**\n{progress} **{score}** XP",
-                color=discord.Color.orange()
-            )
-
-            embed.add_field(name="Cookies", value=f"**{cookies}** 🍪", inline=True)
-            embed.add_field(
-                name="Devlog Time (Total)",
-                value=f"**{format_seconds(devlog_seconds_total)}**",
-                inline=True
-            )
-            embed.add_field(
-                name="Devlog Time (Today)",
-                value=f"**{format_seconds(devlog_seconds_today)}**",
-                inline=True
+                color=_COLOR_ORANGE
             )
 
-            embed.add_field(name="Projects", value=f"**{len(project_ids)}**", inline=True)
+            fields = [
+                ("Cookies", f"**{cookies}** 🍪"),
+                ("Devlog Time (Total)", f"**{format_seconds(devlog_seconds_total)}**"),
+                ("Devlog Time (Today)", f"**{format_seconds(devlog_seconds_today)}**"),
+                ("Projects", f"**{len(project_ids)}**"),
+            ]
             if slack_id:
-                embed.add_field(name="Slack", value=f"`{slack_id}`", inline=True)
-
-            most_active_project = None
-            max_devlogs = 0
-            for pid in project_ids[:10]:
-                try:
-                    project = get_project_by_id(api_key, pid)
-                    devlog_ids = project.get("devlog_ids", [])
-                    if len(devlog_ids) > max_devlogs:
-                        max_devlogs = len(devlog_ids)
-                        most_active_project = project
-                except APIError:
-                    continue
-
-            if most_active_project:
+                fields.append(("Slack", f"`{slack_id}`"))
+            add_fields(embed, fields, inline=True)
+
+            projects = await get_projects_by_ids(api_key, project_ids[:10])
+            most_active_project = max(projects.values(), key=_devlog_count, default=None)
+            max_devlogs = _devlog_count(most_active_project) if most_active_project else 0
+
+            if max_devlogs:
                 project_title = most_active_project.get("title", "Unknown")
                 embed.add_field(
                     name="Most Active Project",
@@ -115,9 +109,15 @@ class Profile(commands.Cog):
     )
     async def profile(self, interaction: discord.Interaction):
         """Show profile - requires authentication."""
+        # an unlocked session answers without touching storage
+        api_key = await get_api_key_for_user(interaction)
+        if api_key:
+            await self._show_profile(interaction, api_key)
+            return
+
         if not is_demo_mode():
             try:
-                if not user_has_key(interaction.user.id):
+                if not await asyncio.to_thread(user_has_key, interaction.user.id):
                     await interaction.response.send_message(
                         "You need to log in first! Use `/login` to store your API key.",
                         ephemeral=True
@@ -127,38 +127,8 @@ class Profile(commands.Cog):
                 await send_error(interaction, "Storage error. Please try again in a moment.")
                 return
         
-        try:
-            api_key = await get_api_key_for_user(interaction)
-        except StorageError:
-            await send_error(interaction, "Storage error. Please try again in a moment.")
-            return
-        if api_key:
-            await self._show_profile(interaction, api_key)
-            return
-        
         # no cached key, need to prompt for password
-        async def on_password(modal_interaction: discord.Interaction, password: str):
-            try:
-                api_key = await get_api_key_for_user(modal_interaction, password)
-            except StorageError:
-                await send_error(modal_interaction, "Storage error. Please try again in a moment.")
-                return
-            if not api_key:
-                if modal_interaction.response.is_done():
-                    await modal_interaction.followup.send(
-                        "Incorrect password! Please try again.",
-                        ephemeral=True
-                    )
-                else:
-                    await modal_interaction.response.send_message(
-                        "Incorrect password! Please try again.",
-                        ephemeral=True
-                    )
-                return
-            
-            await self._show_profile(modal_interaction, api_key)
-        
-        modal = UnlockModal(on_password)
+        modal = UnlockModal(self._show_profile)
         await interaction.response.send_modal(modal)
 
 
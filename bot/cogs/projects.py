@@ -1,14 +1,17 @@
+import asyncio
 import discord
 from discord import app_commands
 from discord.ext import commands
 
 from bot.cogs.login import require_auth, get_api_key_for_user
-from bot.api import get_self, get_project_by_id, create_project, update_project
+from bot.api import get_self, get_project_by_id, get_projects_by_ids, create_project, update_project
 from bot.errors import APIError, StorageError
 from bot.utils import send_error, normalize_optional, require_non_empty, validate_url
 from bot.cogs.views import ConfirmView
 from bot.demo import is_demo_mode
 
+_COLOR_BLUE = discord.Color.blue()
+
 
 class Projects(commands.Cog):
     """Project commands."""
@@ -29,7 +32,7 @@ class Projects(commands.Cog):
             return
 
         try:
-            me = get_self(api_key)
+            me = await get_self(api_key)
             project_ids = me.get("project_ids", [])
             if not project_ids:
                 await send_error(interaction, "No projects found for your account.")
@@ -38,16 +41,17 @@ class Projects(commands.Cog):
             embed = discord.Embed(
                 title="Your Projects",
                 description=f"Total: {len(project_ids)}",
-                color=discord.Color.blue()
+                color=_COLOR_BLUE
             )
 
-            for pid in project_ids[:20]:
-                try:
-                    project = get_project_by_id(api_key, pid)
-                    title = project.get("title", "Unknown")
-                    embed.add_field(name=f"{title} (ID: {pid})", value=project.get("description") or "-", inline=False)
-                except APIError:
+            shown_ids = project_ids[:20]
+            projects = await get_projects_by_ids(api_key, shown_ids)
+            for pid in shown_ids:
+                project = projects.get(pid)
+                if project is None:
                     continue
+                title = project.get("title", "Unknown")
+                embed.add_field(name=f"{title} (ID: {pid})", value=project.get("description") or "-", inline=False)
 
             await interaction.response.send_message(embed=embed, ephemeral=True)
         except APIError as e:
@@ -88,7 +92,7 @@ class Projects(commands.Cog):
             return
 
         try:
-            created = create_project(api_key, title, description, repo_url, demo_url, readme_url)
+            created = await create_project(api_key, title, description, repo_url, demo_url, readme_url)
             proj_id = created.get("id", "unknown")
             proj_title = created.get("title", title)
             await interaction.response.send_message(f"Project created. ID: {proj_id}. Title: {proj_title}", ephemeral=True)
@@ -135,8 +139,10 @@ class Projects(commands.Cog):
             return
 
         try:
-            me = get_self(api_key)
-            project = get_project_by_id(api_key, project_id)
+            me, project = await asyncio.gather(
+                get_self(api_key),
+                get_project_by_id(api_key, project_id),
+            )
             owner_id = project.get("owner_id") or project.get("user_id") or project.get("creator_id")
             if owner_id is not None and me.get("id") != owner_id:
                 await send_error(interaction, "You can only update your own projects.")
@@ -156,7 +162,7 @@ class Projects(commands.Cog):
             return
 
         try:
-            updated = update_project(api_key, project_id, title, description, repo_url, demo_url, readme_url)
+            updated = await update_project(api_key, project_id, title, description, repo_url, demo_url, readme_url)
             proj_title = updated.get("title", "unknown")
             await interaction.followup.send(f"Project updated. ID: {project_id}. Title: {proj_title}", ephemeral=True)
         except APIError as e:
@@ -1,3 +1,4 @@
+import asyncio
 import discord
 from discord import app_commands
 from discord.ext import commands
@@ -6,11 +7,24 @@ from bot.cogs.login import get_api_key_for_user, UnlockModal
 from bot.demo import is_demo_mode
 from bot.storage import user_has_key
 from bot.api import get_users, get_projects, get_shop
+from bot.cache import TTLCache, key_fingerprint
 from bot.errors import APIError, StorageError
 from bot.config import SHOP_PAGE_SIZE
 from bot.utils import clamp_page, calculate_total_pages, send_error
 from bot.cogs.views import SearchUserView, SearchProjectView, ShopListView, ProjectListView
 
+# the shop rarely changes, so each user's sorted item list is reused for a minute
+_SHOP_CACHE = TTLCache(256, 60)
+
+
+async def _get_sorted_shop(api_key: str) -> list:
+    cache_key = key_fingerprint(api_key)
+    items = _SHOP_CACHE.get(cache_key)
+    if items is None:
+        items = sorted(await get_shop(api_key), key=lambda x: x.get("id", 0))
+        _SHOP_CACHE.set(cache_key, items)
+    return items
+
 
 class Search(commands.Cog):
     """Search and list commands."""
@@ -23,17 +37,15 @@ class Search(commands.Cog):
         try:
             if category == "users":
                 requested_page = page
-                data = get_users(api_key, page=page, query=query)
-                items = data.get("users", [])
+                data = await get_users(api_key, page=page, query=query)
                 pagination = data.get("pagination", {})
                 total_pages = pagination.get("total_pages", 1) or 1
                 page = clamp_page(page, total_pages)
 
-                if page != requested_page:
-                    data = get_users(api_key, page=page, query=query)
-                    items = data.get("users", [])
-
+                # the view only fetches the clamped page if this response isn't already it
                 view = SearchUserView(api_key, query, page, total_pages)
+                if pagination.get("current_page", requested_page) == page:
+                    view.remember_page(page, data)
                 embed = await view.get_embed(page)
 
                 if total_pages <= 1:
@@ -42,15 +54,14 @@ class Search(commands.Cog):
                     await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
             else:
                 requested_page = page
-                data = get_projects(api_key, page=page, query=query)
+                data = await get_projects(api_key, page=page, query=query)
                 pagination = data.get("pagination", {})
                 total_pages = pagination.get("total_pages", 1) or 1
                 page = clamp_page(page, total_pages)
 
-                if page != requested_page:
-                    data = get_projects(api_key, page=page, query=query)
-
                 view = SearchProjectView(api_key, query, page, total_pages)
+                if pagination.get("current_page", requested_page) == page:
+                    view.remember_page(page, data)
                 embed = await view.get_embed(page)
 
                 if total_pages <= 1:
@@ -64,13 +75,11 @@ class Search(commands.Cog):
         """Execute the list command with a valid API key."""
         try:
             if category == "shop":
-                items = get_shop(api_key)
+                items = await _get_sorted_shop(api_key)
                 if not items:
                     await interaction.response.send_message("No items found in the shop.", ephemeral=True)
                     return
 
-                items.sort(key=lambda x: x.get("id", 0))
-
                 total_items = len(items)
                 total_pages = calculate_total_pages(total_items, SHOP_PAGE_SIZE)
 
@@ -87,11 +96,12 @@ class Search(commands.Cog):
                 else:
                     await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
             elif category == "projects":
-                data = get_projects(api_key, page=page)
+                data = await get_projects(api_key, page=page)
                 pagination = data.get("pagination", {})
                 total_pages = pagination.get("total_pages", 1)
 
                 view = ProjectListView(api_key, page, total_pages)
+                view.remember_page(page, data)
                 embed = await view.get_embed(page)
 
                 if total_pages <= 1:
@@ -116,9 +126,15 @@ class Search(commands.Cog):
         page: int = 1,
     ):
         """Search for users or projects by query."""
+        # an unlocked session answers without touching storage
+        api_key = await get_api_key_for_user(interaction)
+        if api_key:
+            await self._do_search(interaction, api_key, category.value, query, page)
+            return
+
         if not is_demo_mode():
             try:
-                if not user_has_key(interaction.user.id):
+                if not await asyncio.to_thread(user_has_key, interaction.user.id):
                     await interaction.response.send_message(
                         "You need to log in first! Use `/login` to store your API key.",
                         ephemeral=True
@@ -128,29 +144,8 @@ class Search(commands.Cog):
                 await send_error(interaction, "Storage error. Please try again in a moment.")
                 return
 
-        try:
-            api_key = await get_api_key_for_user(interaction)
-        except StorageError:
-            await send_error(interaction, "Storage error. Please try again in a moment.")
-            return
-        if api_key:
-            await self._do_search(interaction, api_key, category.value, query, page)
-            return
-
-        async def on_password(modal_interaction: discord.Interaction, password: str):
-            try:
-                key = await get_api_key_for_user(modal_interaction, password)
-            except StorageError:
-                await send_error(modal_interaction, "Storage error. Please try again in a moment.")
-                return
-            if not key:
-                await modal_interaction.response.send_message(
-                    "Incorrect password! Please try again.",
-                    ephemeral=True
-                )
-                return
-
-            await self._do_search(modal_interaction, key, category.value, query, page)
+        async def on_password(modal_interaction: discord.Interaction, api_key: str):
+            await self._do_search(modal_interaction, api_key, category.value, query, page)
 
         modal = UnlockModal(on_password)
         await interaction.response.send_modal(modal)
@@ -169,9 +164,15 @@ class Search(commands.Cog):
         page: int = 1,
     ):
         """List shop items or projects."""
+        # an unlocked session answers without touching storage
+        api_key = await get_api_key_for_user(interaction)
+        if api_key:
+            await self._do_list(interaction, api_key, category.value, page)
+            return
+
         if not is_demo_mode():
             try:
-                if not user_has_key(interaction.user.id):
+                if not await asyncio.to_thread(user_has_key, interaction.user.id):
                     await interaction.response.send_message(
                         "You need to log in first! Use `/login` to store your API key.",
                         ephemeral=True
@@ -181,28 +182,8 @@ class Search(commands.Cog):
                 await send_error(interaction, "Storage error. Please try again in a moment.")
                 return
 
-        try:
-            api_key = await get_api_key_for_user(interaction)
-        except StorageError:
-            await send_error(interaction, "Storage error. Please try again in a moment.")
-            return
-        if api_key:
-            await self._do_list(interaction, api_key, category.value, page)
-            return
-
-        async def on_password(modal_interaction: discord.Interaction, password: str):
-            try:
-                key = await get_api_key_for_user(modal_interaction, password)
-            except StorageError:
-                await send_error(modal_interaction, "Storage error. Please try again in a moment.")
-                return
-            if not key:
-                await modal_interaction.response.send_message(
-                    "Incorrect password! Please try again.",
-                    ephemeral=True
-                )
-                return
-            await self._do_list(modal_interaction, key, category.value, page)
+        async def on_password(modal_interaction: discord.Interaction, api_key: str):
+            await self._do_list(modal_interaction, api_key, category.value, page)
 
         modal = UnlockModal(on_password)
         await interaction.response.send_modal(modal)
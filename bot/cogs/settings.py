@@ -1,15 +1,24 @@
+import asyncio
+from functools import lru_cache
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 import discord
 from discord import app_commands
 from discord.ext import commands
 
-from bot.config import DEFAULT_TIMEZONE, DEFAULT_PUBLIC_OUTPUT, DEFAULT_SERVICE
+from bot.config import DEFAULT_TIMEZONE, DEFAULT_PUBLIC_OUTPUT, ALLOWED_SERVICES, RESOLVED_DEFAULT_SERVICE
 from bot.errors import StorageError
 from bot.storage import get_user_preferences, upsert_user_preferences
 from bot.utils import send_error
 
-ALLOWED_SERVICES = {"flavortown", "hackatime"}
+_COLOR_BLUE = discord.Color.blue()
+_COLOR_GREEN = discord.Color.green()
+
+
+@lru_cache(maxsize=512)
+def _zoneinfo(tz: str) -> ZoneInfo:
+    # failed lookups raise, so only valid zones are remembered
+    return ZoneInfo(tz)
 
 
 class Settings(commands.Cog):
@@ -22,7 +31,7 @@ class Settings(commands.Cog):
 
     def _validate_timezone(self, tz: str) -> str:
         try:
-            ZoneInfo(tz)
+            _zoneinfo(tz)
         except ZoneInfoNotFoundError as e:
             raise ValueError("Invalid timezone. Use an IANA name like 'UTC' or 'America/New_York'.") from e
         return tz
@@ -32,13 +41,10 @@ class Settings(commands.Cog):
             raise ValueError("default_service must be 'flavortown' or 'hackatime'.")
         return service
 
-    def _resolve_default_service(self) -> str:
-        return DEFAULT_SERVICE if DEFAULT_SERVICE in ALLOWED_SERVICES else "flavortown"
-
     @settings.command(name="view", description="View your settings")
     async def settings_view(self, interaction: discord.Interaction):
         try:
-            prefs = get_user_preferences(interaction.user.id)
+            prefs = await asyncio.to_thread(get_user_preferences, interaction.user.id)
         except StorageError:
             await send_error(interaction, "Storage error. Please try again in a moment.")
             return
@@ -49,9 +55,9 @@ class Settings(commands.Cog):
 
         tz_value = timezone or DEFAULT_TIMEZONE
         public_value = public_output if public_output is not None else DEFAULT_PUBLIC_OUTPUT
-        service_value = default_service or self._resolve_default_service()
+        service_value = default_service or RESOLVED_DEFAULT_SERVICE
 
-        embed = discord.Embed(title="Settings", color=discord.Color.blue())
+        embed = discord.Embed(title="Settings", color=_COLOR_BLUE)
         embed.add_field(name="Timezone", value=tz_value, inline=False)
         embed.add_field(name="Output visibility", value="Public" if public_value else "Private", inline=False)
         embed.add_field(name="Default service", value=service_value, inline=False)
@@ -86,7 +92,7 @@ class Settings(commands.Cog):
             return
 
         try:
-            existing = get_user_preferences(interaction.user.id) or {}
+            existing = await asyncio.to_thread(get_user_preferences, interaction.user.id) or {}
         except StorageError:
             await send_error(interaction, "Storage error. Please try again in a moment.")
             return
@@ -106,21 +112,28 @@ class Settings(commands.Cog):
         resolved_default_service = (
             default_service_value
             if default_service_value is not None
-            else existing.get("default_service") or self._resolve_default_service()
+            else existing.get("default_service") or RESOLVED_DEFAULT_SERVICE
         )
 
-        try:
-            upsert_user_preferences(
-                interaction.user.id,
-                resolved_timezone,
-                resolved_public_output,
-                resolved_default_service,
-            )
-        except StorageError:
-            await send_error(interaction, "Storage error. Please try again in a moment.")
-            return
-
-        embed = discord.Embed(title="Settings Updated", color=discord.Color.green())
+        unchanged = (
+            existing.get("timezone") == resolved_timezone
+            and existing.get("public_output") == resolved_public_output
+            and existing.get("default_service") == resolved_default_service
+        )
+        if not unchanged:
+            try:
+                await asyncio.to_thread(
+                    upsert_user_preferences,
+                    interaction.user.id,
+                    resolved_timezone,
+                    resolved_public_output,
+                    resolved_default_service,
+                )
+            except StorageError:
+                await send_error(interaction, "Storage error. Please try again in a moment.")
+                return
+
+        embed = discord.Embed(title="Settings Updated", color=_COLOR_GREEN)
         embed.add_field(name="Timezone", value=resolved_timezone, inline=False)
         embed.add_field(name="Output visibility", value="Public" if resolved_public_output else "Private", inline=False)
         embed.add_field(name="Default service", value=resolved_default_service, inline=False)
@@ -1,23 +1,57 @@
-import sqlite3
+import asyncio
 from datetime import datetime, timezone
-from pathlib import Path
 
 import discord
 from discord import app_commands
-from discord.ext import commands
+from discord.ext import commands, tasks
 
 from bot import __version__, BOT_START_TIME
+from bot.cache import TTLCache
 from bot.cogs.login import require_auth, get_api_key_for_user
 from bot.errors import HackatimeError, StorageError
 from bot.hackatime import get_time_today
+from bot.storage import DB_PATH, optimize_db, quick_check
 from bot.utils import send_error
 
+_COLOR_GREEN = discord.Color.green()
+_COLOR_PURPLE = discord.Color.purple()
+
+DB_OPTIMIZE_MINUTES = 15
+
+# /health reuses the last integrity check for this long
+DB_STATUS_TTL_SECONDS = 60
+_DB_STATUS_CACHE = TTLCache(1, DB_STATUS_TTL_SECONDS)
+
+
+def _check_db() -> str:
+    if not DB_PATH.exists():
+        return "Missing (keys.db not found)"
+
+    try:
+        result = quick_check()
+    except StorageError as e:
+        return f"Error: {type(e.__cause__ or e).__name__}"
+    if result == "ok":
+        return "OK"
+    return f"Check: {result}"
+
 
 class System(commands.Cog):
     """Health and time commands."""
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self._optimize_db.start()
+
+    @tasks.loop(minutes=DB_OPTIMIZE_MINUTES)
+    async def _optimize_db(self):
+        try:
+            await asyncio.to_thread(optimize_db)
+        except StorageError:
+            pass  # tried again on the next run
+
+    def cog_unload(self):
+        self._optimize_db.cancel()
 
     def _format_uptime(self, start_time: datetime) -> str:
         delta = datetime.now(timezone.utc) - start_time
@@ -32,30 +66,22 @@ class System(commands.Cog):
             return f"{minutes}m {seconds}s"
         return f"{seconds}s"
 
-    def _get_db_status(self) -> str:
-        db_path = Path(__file__).resolve().parents[2] / "data" / "keys.db"
-        if not db_path.exists():
-            return "Missing (keys.db not found)"
-
-        try:
-            with sqlite3.connect(str(db_path)) as conn:
-                cur = conn.execute("PRAGMA quick_check;")
-                result = cur.fetchone()
-                if result and result[0] == "ok":
-                    return "OK"
-                return f"Check: {result[0] if result else 'unknown'}"
-        except Exception as e:
-            return f"Error: {type(e).__name__}"
+    async def _get_db_status(self) -> str:
+        status = _DB_STATUS_CACHE.get("db")
+        if status is None:
+            status = await asyncio.to_thread(_check_db)
+            _DB_STATUS_CACHE.set("db", status)
+        return status
 
     @app_commands.command(name="health", description="Check the bot's health")
     async def health(self, interaction: discord.Interaction):
         """Show the bot's health"""
         uptime = self._format_uptime(BOT_START_TIME)
-        db_status = self._get_db_status()
+        db_status = await self._get_db_status()
 
         embed = discord.Embed(
             title="Bot Health",
-            color=discord.Color.green()
+            color=_COLOR_GREEN
         )
 
         embed.add_field(name="Version", value=__version__, inline=True)
@@ -78,14 +104,14 @@ class System(commands.Cog):
             return
 
         try:
-            data = get_time_today(api_key)
+            data = await get_time_today(api_key)
             grand_total = data.get("data", {}).get("grand_total", {})
             text = grand_total.get("text", "0 secs")
 
             embed = discord.Embed(
                 title="Hackatime Progress",
                 description=f"You have coded for **{text}** today! ⏱️",
-                color=discord.Color.purple()
+                color=_COLOR_PURPLE
             )
             await interaction.response.send_message(embed=embed)
         except HackatimeError as e:
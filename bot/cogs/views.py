@@ -1,3 +1,6 @@
+from collections import OrderedDict
+from typing import Any
+
 import discord
 
 from bot.api import (
@@ -15,7 +18,31 @@ from bot.config import (
     SEARCH_USERS_PAGE_SIZE,
     SEARCH_PROJECTS_PAGE_SIZE,
 )
-from bot.utils import send_error
+from bot.utils import iter_chunked, send_error, truncate
+
+_COLOR_BLUE = discord.Color.blue()
+_COLOR_GOLD = discord.Color.gold()
+
+# empty pages of the fixed-title lists; only ever sent, never modified
+_EMPTY_DEVLOGS_EMBED = discord.Embed(
+    title="Devlogs",
+    description="No devlogs found on this page.",
+    color=_COLOR_BLUE,
+)
+_EMPTY_PROJECTS_EMBED = discord.Embed(
+    title="Flavortown Projects",
+    description="No projects found on this page.",
+    color=_COLOR_BLUE,
+)
+
+# raw responses each pagination view keeps so paging back doesn't refetch
+PAGE_CACHE_SIZE = 16
+
+# longest text shown in a single list entry before it is cut with "..."
+DEVLOG_PREVIEW_LENGTH = 120
+SEARCH_DESCRIPTION_LENGTH = 100
+PROJECT_DESCRIPTION_LENGTH = 80
+DEVLOGS_PER_PAGE = 10
 
 
 class ConfirmView(discord.ui.View):
@@ -44,6 +71,7 @@ class PaginationView(discord.ui.View):
         self.api_key = api_key
         self.current_page = current_page
         self.total_pages = total_pages
+        self._page_cache: OrderedDict[int, Any] = OrderedDict()
         self._update_buttons()
 
     def _update_buttons(self):
@@ -55,6 +83,32 @@ class PaginationView(discord.ui.View):
         """Override in subclass to generate embed for given page."""
         raise NotImplementedError
 
+    async def fetch_page(self, page: int) -> Any:
+        """Override in subclass to fetch the API response for given page."""
+        raise NotImplementedError
+
+    def remember_page(self, page: int, data: Any) -> None:
+        """Store a response already fetched for page."""
+        cache = self._page_cache
+        cache[page] = data
+        cache.move_to_end(page)
+        if len(cache) > PAGE_CACHE_SIZE:
+            cache.popitem(last=False)
+
+    async def on_timeout(self) -> None:
+        # the buttons stop working after timeout, so the fetched pages are dead weight
+        self._page_cache.clear()
+
+    async def load_page(self, page: int) -> Any:
+        """Return the response for page, fetching it only on the first visit."""
+        data = self._page_cache.get(page)
+        if data is None:
+            data = await self.fetch_page(page)
+            self.remember_page(page, data)
+        else:
+            self._page_cache.move_to_end(page)
+        return data
+
     @discord.ui.button(label="◀ Previous", style=discord.ButtonStyle.secondary)
     async def prev_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         self.current_page -= 1
@@ -84,27 +138,27 @@ class DevlogListView(PaginationView):
     def __init__(self, api_key: str, current_page: int, total_pages: int):
         super().__init__(api_key, current_page, total_pages)
 
+    async def fetch_page(self, page: int) -> Any:
+        return await list_devlogs(self.api_key, page=page)
+
     async def get_embed(self, page: int) -> discord.Embed:
-        data = list_devlogs(self.api_key, page=page)
+        data = await self.load_page(page)
         devlogs = data.get("devlogs", [])
+        if not devlogs:
+            return _EMPTY_DEVLOGS_EMBED
         total_count = data.get("pagination", {}).get("total_count", "Unknown")
 
         embed = discord.Embed(
             title="Devlogs",
             description=f"Total: {total_count} (Page {page})",
-            color=discord.Color.blue()
+            color=_COLOR_BLUE
         )
 
-        if not devlogs:
-            embed.description = "No devlogs found on this page."
-            return embed
-
-        for d in devlogs[:10]:
-            body = (d.get("body") or "").strip()
-            if len(body) > 120:
-                body = body[:117] + "..."
+        add_field = embed.add_field
+        for d in devlogs[:DEVLOGS_PER_PAGE]:
+            body = truncate((d.get("body") or "").strip(), DEVLOG_PREVIEW_LENGTH)
             devlog_id = d.get("id", "unknown")
-            embed.add_field(
+            add_field(
                 name=f"Devlog {devlog_id}",
                 value=body or "No body",
                 inline=False
@@ -117,27 +171,29 @@ class ProjectDevlogListView(PaginationView):
         super().__init__(api_key, current_page, total_pages)
         self.project_id = project_id
 
+    async def fetch_page(self, page: int) -> Any:
+        return await get_project_devlogs(self.api_key, self.project_id, page=page)
+
     async def get_embed(self, page: int) -> discord.Embed:
-        data = get_project_devlogs(self.api_key, self.project_id, page=page)
+        data = await self.load_page(page)
         devlogs = data.get("devlogs", [])
         total_count = data.get("pagination", {}).get("total_count", "Unknown")
 
         embed = discord.Embed(
             title=f"Project {self.project_id} Devlogs",
             description=f"Total: {total_count} (Page {page})",
-            color=discord.Color.blue()
+            color=_COLOR_BLUE
         )
 
         if not devlogs:
             embed.description = "No devlogs found on this page."
             return embed
 
-        for d in devlogs[:10]:
-            body = (d.get("body") or "").strip()
-            if len(body) > 120:
-                body = body[:117] + "..."
+        add_field = embed.add_field
+        for d in devlogs[:DEVLOGS_PER_PAGE]:
+            body = truncate((d.get("body") or "").strip(), DEVLOG_PREVIEW_LENGTH)
             devlog_id = d.get("id", "unknown")
-            embed.add_field(
+            add_field(
                 name=f"Devlog {devlog_id}",
                 value=body or "No body",
                 inline=False
@@ -150,26 +206,32 @@ class SearchUserView(PaginationView):
         super().__init__(api_key, current_page, total_pages)
         self.query = query
 
+    async def fetch_page(self, page: int) -> Any:
+        return await get_users(self.api_key, page=page, query=self.query)
+
     async def get_embed(self, page: int) -> discord.Embed:
-        data = get_users(self.api_key, page=page, query=self.query)
+        data = await self.load_page(page)
         items = data.get("users", [])
         total_count = data.get("pagination", {}).get("total_count", "Unknown")
 
         embed = discord.Embed(
             title=f"User Search: '{self.query}'",
             description=f"Found {total_count} results (Page {page})",
-            color=discord.Color.blue()
+            color=_COLOR_BLUE
         )
 
         if not items:
             embed.description = f"No users found matching '{self.query}'."
 
+        add_field = embed.add_field
         for user in items[:SEARCH_USERS_PAGE_SIZE]:
             d_name = user.get("display_name") or "Unknown"
-            c_count = user.get("cookies") if user.get("cookies") is not None else 0
+            c_count = user.get("cookies")
+            if c_count is None:
+                c_count = 0
             s_id = user.get("slack_id") or "N/A"
 
-            embed.add_field(
+            add_field(
                 name=f"{d_name} (ID: {user.get('id')})",
                 value=f"Slack: `{s_id}`\nCookies: {c_count}",
                 inline=True
@@ -182,28 +244,30 @@ class SearchProjectView(PaginationView):
         super().__init__(api_key, current_page, total_pages)
         self.query = query
 
+    async def fetch_page(self, page: int) -> Any:
+        return await get_projects(self.api_key, page=page, query=self.query)
+
     async def get_embed(self, page: int) -> discord.Embed:
-        data = get_projects(self.api_key, page=page, query=self.query)
+        data = await self.load_page(page)
         items = data.get("projects", [])
         total_count = data.get("pagination", {}).get("total_count", "Unknown")
 
         embed = discord.Embed(
             title=f"Project Search: '{self.query}'",
             description=f"Found {total_count} results (Page {page})",
-            color=discord.Color.blue()
+            color=_COLOR_BLUE
         )
 
         if not items:
             embed.description = f"No projects found matching '{self.query}'."
 
+        add_field = embed.add_field
         for project in items[:SEARCH_PROJECTS_PAGE_SIZE]:
             title = project.get("title") or "Unknown"
-            desc = project.get("description") or "-"
-            if len(desc) > 100:
-                desc = desc[:97] + "..."
+            desc = truncate(project.get("description") or "-", SEARCH_DESCRIPTION_LENGTH)
             repo = project.get("repo_url") or "No repo"
 
-            embed.add_field(
+            add_field(
                 name=f"{title} (ID: {project.get('id')})",
                 value=f"{desc}\n[Repo]({repo})" if repo != "No repo" else desc,
                 inline=False
@@ -216,18 +280,23 @@ class ShopListView(PaginationView):
         super().__init__(api_key, current_page, total_pages)
         self.items = items
         self.per_page = SHOP_PAGE_SIZE
+        self._pages = tuple(iter_chunked(items, self.per_page))
+
+    async def on_timeout(self) -> None:
+        self.items = []
+        self._pages = ()
+        await super().on_timeout()
 
     async def get_embed(self, page: int) -> discord.Embed:
-        start_idx = (page - 1) * self.per_page
-        end_idx = start_idx + self.per_page
-        page_items = self.items[start_idx:end_idx]
+        page_items = self._pages[page - 1] if 0 < page <= len(self._pages) else ()
 
         embed = discord.Embed(
             title="Flavortown Shop",
             description=f"Page {page} of {self.total_pages} ({len(self.items)} items total)",
-            color=discord.Color.gold()
+            color=_COLOR_GOLD
         )
 
+        add_field = embed.add_field
         for item in page_items:
             name = item.get("name") or "Unknown"
             ticket_cost = item.get("ticket_cost", {})
@@ -237,8 +306,8 @@ class ShopListView(PaginationView):
                 stock = "∞"
             is_limited = " (Limited)" if item.get("limited") else ""
 
-            embed.add_field(
-                name=f"{name}",
+            add_field(
+                name=name,
                 value=f"Cost: {base_cost} | Stock: {stock}{is_limited}",
                 inline=False
             )
@@ -249,29 +318,30 @@ class ProjectListView(PaginationView):
     def __init__(self, api_key: str, current_page: int, total_pages: int):
         super().__init__(api_key, current_page, total_pages)
 
+    async def fetch_page(self, page: int) -> Any:
+        return await get_projects(self.api_key, page=page)
+
     async def get_embed(self, page: int) -> discord.Embed:
-        data = get_projects(self.api_key, page=page)
+        data = await self.load_page(page)
         items = data.get("projects", [])
+        if not items:
+            return _EMPTY_PROJECTS_EMBED
         total_count = data.get("pagination", {}).get("total_count", "Unknown")
 
         embed = discord.Embed(
             title="Flavortown Projects",
             description=f"Total Projects: {total_count} (Page {page})",
-            color=discord.Color.blue()
+            color=_COLOR_BLUE
         )
 
-        if not items:
-            embed.description = "No projects found on this page."
-
+        add_field = embed.add_field
         for project in items[:PROJECT_PAGE_SIZE]:
             title = project.get("title") or "Unknown"
-            desc = project.get("description") or "-"
-            if len(desc) > 80:
-                desc = desc[:77] + "..."
+            desc = truncate(project.get("description") or "-", PROJECT_DESCRIPTION_LENGTH)
             repo = project.get("repo_url") or "#"
 
-            embed.add_field(
-                name=f"{title}",
+            add_field(
+                name=title,
                 value=f"{desc}\n[Code]({repo})",
                 inline=False
             )
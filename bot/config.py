@@ -15,6 +15,8 @@ SEARCH_PROJECTS_PAGE_SIZE = int(os.getenv("SEARCH_PROJECTS_PAGE_SIZE", "20"))
 DEFAULT_TIMEZONE = os.getenv("DEFAULT_TIMEZONE", "UTC")
 DEFAULT_PUBLIC_OUTPUT = os.getenv("DEFAULT_PUBLIC_OUTPUT", "false").lower() in ("1", "true", "yes", "y", "on")
 DEFAULT_SERVICE = os.getenv("DEFAULT_SERVICE", "flavortown")
+ALLOWED_SERVICES = frozenset({"flavortown", "hackatime"})
+RESOLVED_DEFAULT_SERVICE = DEFAULT_SERVICE if DEFAULT_SERVICE in ALLOWED_SERVICES else "flavortown"
 
 DEMO_MODE = os.getenv("DEMO_MODE", "false").lower() in ("1", "true", "yes", "y", "on")
 DEMO_API_KEY = os.getenv("DEMO_API_KEY", "").strip() or None
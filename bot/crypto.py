@@ -1,27 +1,120 @@
 """
 Cryptographic utilities for secure API key storage.
 
-Uses Fernet symmetric encryption with PBKDF2 key derivation.
+Uses Fernet symmetric encryption with scrypt key derivation (keys stored
+before scrypt was adopted still use PBKDF2).
 The bot operator cannot decrypt keys without knowing each user's password.
 """
 
 import os
 import base64
+import hashlib
+import threading
+from collections import OrderedDict
 from cryptography.fernet import Fernet, InvalidToken
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+PBKDF2_ITERATIONS = 480000  # thats a lot :D
+
+# scrypt with 32 MiB of memory per derivation; costs less CPU than the PBKDF2
+# setting above while being far more expensive to attack on GPUs
+SCRYPT_N = 2 ** 15
+SCRYPT_R = 8
+SCRYPT_P = 1
+_SCRYPT_MAXMEM = 2 * 128 * SCRYPT_N * SCRYPT_R
+# salts of scrypt-derived keys are stored with this prefix; unprefixed salts are PBKDF2
+_SCRYPT_SALT_PREFIX = "scrypt$"
 
 
 def _derive_key(password: str, salt: bytes) -> bytes:
     """Derive a Fernet-compatible key from a password and salt."""
-    kdf = PBKDF2HMAC(
-        algorithm=hashes.SHA256(),
-        length=32,
+    key = hashlib.pbkdf2_hmac(
+        "sha256",
+        password.encode(),
+        salt,
+        PBKDF2_ITERATIONS,
+        dklen=32,
+    )
+    return base64.urlsafe_b64encode(key)
+
+
+def _derive_key_scrypt(password: str, salt: bytes) -> bytes:
+    """Derive a Fernet-compatible key from a password and salt with scrypt."""
+    key = hashlib.scrypt(
+        password.encode(),
         salt=salt,
-        iterations=480000,  # thats a lot :D
+        n=SCRYPT_N,
+        r=SCRYPT_R,
+        p=SCRYPT_P,
+        maxmem=_SCRYPT_MAXMEM,
+        dklen=32,
     )
-    key = base64.urlsafe_b64encode(kdf.derive(password.encode()))
-    return key
+    return base64.urlsafe_b64encode(key)
+
+
+# Ciphers for derived keys are remembered per (password fingerprint, kdf, salt)
+# so unlocking the same stored key again skips the KDF and the Fernet key setup.
+# Only keys that actually decrypted are remembered, and callers drop a stored
+# key's entries with forget_derived_keys when its session ends.
+# The fingerprint is keyed with a secret that only lives in this process, so the
+# cache never holds or reveals the password.
+DERIVED_KEY_CACHE_SIZE = 1024
+_PROCESS_SECRET = os.urandom(32)
+_derived_keys: OrderedDict[tuple[bytes, str, bytes], Fernet] = OrderedDict()
+_derived_keys_lock = threading.Lock()
+
+
+def _password_fingerprint(password: str) -> bytes:
+    return hashlib.blake2b(password.encode(), key=_PROCESS_SECRET, digest_size=16).digest()
+
+
+def _new_fernet(password: str, salt: bytes, kdf: str) -> Fernet:
+    derive = _derive_key_scrypt if kdf == "scrypt" else _derive_key
+    return Fernet(derive(password, salt))
+
+
+def _cached_fernet(cache_key: tuple[bytes, str, bytes]) -> Fernet | None:
+    with _derived_keys_lock:
+        fernet = _derived_keys.get(cache_key)
+        if fernet is not None:
+            _derived_keys.move_to_end(cache_key)
+        return fernet
+
+
+def _remember_fernet(cache_key: tuple[bytes, str, bytes], fernet: Fernet) -> None:
+    with _derived_keys_lock:
+        _derived_keys[cache_key] = fernet
+        while len(_derived_keys) > DERIVED_KEY_CACHE_SIZE:
+            _derived_keys.popitem(last=False)
+
+
+def _parse_salt(salt_b64: str) -> tuple[str, bytes]:
+    """Split a stored salt into (kdf, salt bytes)."""
+    kdf = "pbkdf2"
+    if salt_b64.startswith(_SCRYPT_SALT_PREFIX):
+        kdf = "scrypt"
+        salt_b64 = salt_b64[len(_SCRYPT_SALT_PREFIX):]
+    return kdf, base64.urlsafe_b64decode(salt_b64.encode())
+
+
+def forget_derived_keys(salt_b64: str) -> None:
+    """Forget cached derived keys for one stored key (identified by its salt)."""
+    try:
+        _, salt = _parse_salt(salt_b64)
+    except ValueError:
+        return
+    with _derived_keys_lock:
+        for cache_key in [k for k in _derived_keys if k[2] == salt]:
+            del _derived_keys[cache_key]
+
+
+def clear_derived_key_cache() -> None:
+    """Forget all cached derived keys."""
+    with _derived_keys_lock:
+        _derived_keys.clear()
+
+
+# every Fernet token starts with version byte 0x80 followed by zeroed high timestamp bytes
+_FERNET_TOKEN_PREFIX = b"gAAAAA"
 
 
 def encrypt_api_key(api_key: str, password: str) -> tuple[str, str]:
@@ -29,15 +122,15 @@ def encrypt_api_key(api_key: str, password: str) -> tuple[str, str]:
     Encrypt an API key with a user-provided password.
     
     Returns:
-        tuple of (encrypted_key_b64, salt_b64) - both base64 encoded strings
+        tuple of (fernet_token, salt_b64) - both base64 encoded strings
         suitable for database storage.
     """
     salt = os.urandom(16)
-    key = _derive_key(password, salt)
-    fernet = Fernet(key)
+    fernet = _new_fernet(password, salt, "scrypt")
+    # Fernet tokens are already urlsafe base64, so they are stored as-is
     encrypted = fernet.encrypt(api_key.encode())
     
-    return base64.urlsafe_b64encode(encrypted).decode(), base64.urlsafe_b64encode(salt).decode()
+    return encrypted.decode(), _SCRYPT_SALT_PREFIX + base64.urlsafe_b64encode(salt).decode()
 
 
 def decrypt_api_key(encrypted_key_b64: str, salt_b64: str, password: str) -> str | None:
@@ -48,11 +141,20 @@ def decrypt_api_key(encrypted_key_b64: str, salt_b64: str, password: str) -> str
         The decrypted API key, or None if decryption fails (wrong password).
     """
     try:
-        encrypted = base64.urlsafe_b64decode(encrypted_key_b64.encode())
-        salt = base64.urlsafe_b64decode(salt_b64.encode())
-        key = _derive_key(password, salt)
-        fernet = Fernet(key)
+        encrypted = encrypted_key_b64.encode()
+        if not encrypted.startswith(_FERNET_TOKEN_PREFIX):
+            # stored before tokens were saved as-is: base64 of the token
+            encrypted = base64.urlsafe_b64decode(encrypted)
+        kdf, salt = _parse_salt(salt_b64)
+        cache_key = (_password_fingerprint(password), kdf, salt)
+        fernet = _cached_fernet(cache_key)
+        if fernet is not None:
+            return fernet.decrypt(encrypted).decode()
+
+        fernet = _new_fernet(password, salt, kdf)
         decrypted = fernet.decrypt(encrypted)
+        # wrong guesses raise above, so they never take a slot in the cache
+        _remember_fernet(cache_key, fernet)
         return decrypted.decode()
     except (InvalidToken, ValueError):
         return None
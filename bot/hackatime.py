@@ -2,9 +2,14 @@ from typing import TypedDict
 
 from bot.http import _request
 from bot.errors import HackatimeError
+from bot.cache import TTLCache, coalesce, key_fingerprint
 
 HACKATIME_BASE_URL = "https://hackatime.hackclub.com"
 
+# Hackatime only refreshes these about once a minute, so repeat commands reuse them
+RESPONSE_CACHE_TTL_SECONDS = 30
+_RESPONSE_CACHE = TTLCache(maxsize=1024, ttl=RESPONSE_CACHE_TTL_SECONDS)
+
 
 class HackatimeGrandTotal(TypedDict, total=False):
     text: str
@@ -28,12 +33,29 @@ def _get_headers(api_key: str) -> dict[str, str]:
         "Authorization": f"Bearer {api_key}",
     }
 
-def get_time_today(api_key: str) -> HackatimeTodayResponse:
+async def _get_cached(cache_key: tuple, url: str, api_key: str, *, action: str, fresh: bool = False):
+    """GET a Hackatime endpoint through the response cache; `fresh` always asks the API."""
+    def fetch():
+        return _request("GET", url, headers=_get_headers(api_key), action=action, service="hackatime", error_class=HackatimeError)
+
+    if fresh:
+        data = await fetch()
+    else:
+        cached = _RESPONSE_CACHE.get(cache_key)
+        if cached is not None:
+            return cached
+        data = await coalesce(cache_key, fetch)
+    _RESPONSE_CACHE.set(cache_key, data)
+    return data
+
+async def get_time_today(api_key: str, *, fresh: bool = False) -> HackatimeTodayResponse:
     # GET /api/hackatime/v1/users/current/statusbar/today
     url = f"{HACKATIME_BASE_URL}/api/hackatime/v1/users/current/statusbar/today"
-    return _request("GET", url, headers=_get_headers(api_key), action="Fetch today", service="hackatime", error_class=HackatimeError)
+    cache_key = (key_fingerprint(api_key), "hackatime-today")
+    return await _get_cached(cache_key, url, api_key, action="Fetch today", fresh=fresh)
 
-def get_stats(api_key: str, username: str) -> HackatimeStatsResponse:
+async def get_stats(api_key: str, username: str) -> HackatimeStatsResponse:
     # GET /api/v1/users/{username}/stats
     url = f"{HACKATIME_BASE_URL}/api/v1/users/{username}/stats"
-    return _request("GET", url, headers=_get_headers(api_key), action="Fetch stats", service="hackatime", error_class=HackatimeError)
+    cache_key = (key_fingerprint(api_key), "hackatime-stats", username)
+    return await _get_cached(cache_key, url, api_key, action="Fetch stats")
@@ -1,129 +1,233 @@
+import asyncio
 import logging
-import time
-from typing import Any
+import random
+from typing import Any, Callable, Mapping
 
-import requests
+import aiohttp
+import orjson
 
-logger = logging.getLogger(__name__)
-_SESSION = requests.Session()
+from bot import __version__
 
-_STATS = {
-    "total_calls": 0,
-    "error_calls": 0,
-    "by_service": {},
-}
+logger = logging.getLogger(__name__)
+_LOG_API_ERROR = "event=api_error service=%s method=%s url=%s status=%s"
+_LOG_API_ERROR_DETAIL = "event=api_error service=%s method=%s url=%s status=%s detail=%s"
+_LOG_API_EXCEPTION = "event=api_exception service=%s method=%s url=%s error=%s"
+_LOG_API_BAD_JSON = "event=api_bad_json service=%s method=%s url=%s status=%s error=%s"
+_SESSION: aiohttp.ClientSession | None = None
+
+# pooled connections are kept open between commands so repeat calls skip the TCP/TLS handshake
+HTTP_POOL_LIMIT = 100
+# one busy host (e.g. Hackatime during a burst) can't take the whole pool
+HTTP_POOL_LIMIT_PER_HOST = 64
+HTTP_KEEPALIVE_SECONDS = 75
+# sent on every request as a session default rather than rebuilt per call
+USER_AGENT = f"JohnFlavortown/{__version__}"
+
+# 502/503/504 are retried up to this many times, with decorrelated-jitter backoff between tries
+RETRY_STATUSES = frozenset({502, 503, 504})
+MAX_RETRIES = 2
+RETRY_BACKOFF_BASE = 0.5
+RETRY_BACKOFF_CAP = 5.0
+
+# [total calls, error calls], overall and per service; bumped on every request
+_TOTALS = [0, 0]
+_SERVICE_TOTALS: dict[str, list[int]] = {}
+
+
+def _service_totals(service: str) -> list[int]:
+    totals = _SERVICE_TOTALS.get(service)
+    if totals is None:
+        totals = _SERVICE_TOTALS[service] = [0, 0]
+    return totals
 
 
 def _track_call(service: str) -> None:
-    _STATS["total_calls"] += 1
-    _STATS["by_service"].setdefault(service, {"total": 0, "errors": 0})
-    _STATS["by_service"][service]["total"] += 1
+    _TOTALS[0] += 1
+    _service_totals(service)[0] += 1
 
 
 def _track_error(service: str) -> None:
-    _STATS["error_calls"] += 1
-    _STATS["by_service"].setdefault(service, {"total": 0, "errors": 0})
-    _STATS["by_service"][service]["errors"] += 1
+    _TOTALS[1] += 1
+    _service_totals(service)[1] += 1
 
 
 def get_http_stats() -> dict:
     return {
-        "total_calls": _STATS["total_calls"],
-        "error_calls": _STATS["error_calls"],
-        "by_service": {k: v.copy() for k, v in _STATS["by_service"].items()},
+        "total_calls": _TOTALS[0],
+        "error_calls": _TOTALS[1],
+        "by_service": {k: {"total": v[0], "errors": v[1]} for k, v in _SERVICE_TOTALS.items()},
     }
 
 
 def reset_http_stats() -> None:
-    _STATS["total_calls"] = 0
-    _STATS["error_calls"] = 0
-    _STATS["by_service"].clear()
+    _TOTALS[0] = _TOTALS[1] = 0
+    _SERVICE_TOTALS.clear()
 
 
 class HTTPAPIError(Exception):
     pass
 
 
+def _get_session() -> aiohttp.ClientSession:
+    """Return the shared client session, creating it on first use inside the running loop."""
+    global _SESSION
+    if _SESSION is None or _SESSION.closed:
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_POOL_LIMIT,
+            limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+            keepalive_timeout=HTTP_KEEPALIVE_SECONDS,
+        )
+        _SESSION = aiohttp.ClientSession(connector=connector, headers={"User-Agent": USER_AGENT})
+    return _SESSION
+
+
+async def close_session() -> None:
+    """Close the shared client session."""
+    global _SESSION
+    if _SESSION is not None and not _SESSION.closed:
+        await _SESSION.close()
+    _SESSION = None
+
+
+def _retry_delay(response: aiohttp.ClientResponse, previous: float) -> float:
+    """Seconds to wait before retrying: Retry-After when the server sends one, else jittered backoff."""
+    retry_after = response.headers.get("Retry-After")
+    if retry_after is not None:
+        try:
+            return min(max(float(retry_after), 0.0), RETRY_BACKOFF_CAP)
+        except ValueError:
+            pass  # HTTP-date form; fall back to backoff
+    return min(RETRY_BACKOFF_CAP, random.uniform(RETRY_BACKOFF_BASE, max(previous, RETRY_BACKOFF_BASE) * 3))
+
+
 def _format_error(action: str, url: str, status: int | None, detail: str) -> str:
     status_text = str(status) if status is not None else "unknown"
     return f"{action} failed (status={status_text}) {detail} | url={url}"
 
 
-def _request(
+async def _read_json(response: aiohttp.ClientResponse) -> Any:
+    # same result as response.json(content_type=None), parsed with orjson straight from bytes
+    body = await response.read()
+    return orjson.loads(body) if body.strip() else None
+
+
+async def _execute(
     method: str,
     url: str,
+    request_kwargs: Callable[[], dict[str, Any]],
     *,
-    headers: dict[str, str],
-    params: dict[str, Any] | None = None,
-    json: dict[str, Any] | None = None,
-    timeout: int = 10,
-    action: str = "Request",
-    service: str = "api",
-    error_class: type[HTTPAPIError] = HTTPAPIError,
+    timeout: int,
+    action: str,
+    service: str,
+    error_class: type[HTTPAPIError],
 ) -> Any:
-    max_retries = 2
-    backoffs = [0.5, 1.0]
+    """Send a request with retries on RETRY_STATUSES, raising error_class on failure.
+
+    request_kwargs is called once per attempt for the body-specific arguments.
+    """
+    delay = RETRY_BACKOFF_BASE
+    session = _get_session()
 
-    for attempt in range(max_retries + 1):
+    for attempt in range(MAX_RETRIES + 1):
+        status = None
         try:
             _track_call(service)
-            response = _SESSION.request(
+            async with session.request(
                 method,
                 url,
-                headers=headers,
-                params=params,
-                json=json,
-                timeout=timeout,
-            )
-
-            if response.status_code in (502, 503, 504) and attempt < max_retries:
-                time.sleep(backoffs[attempt])
-                continue
-
-            if response.status_code == 401:
-                logger.error(
-                    "event=api_error service=%s method=%s url=%s status=%s",
-                    service,
-                    method,
-                    url,
-                    response.status_code,
-                )
-                _track_error(service)
-                raise error_class(_format_error(action, url, 401, "Invalid API key or unauthorized access."))
-
-            response.raise_for_status()
-            return response.json()
-        except requests.HTTPError as e:
-            status = e.response.status_code if e.response else None
-            detail = e.response.text.strip() if e.response and e.response.text else str(e)
-            logger.error(
-                "event=api_error service=%s method=%s url=%s status=%s detail=%s",
-                service,
-                method,
-                url,
-                status,
-                detail,
-            )
+                timeout=aiohttp.ClientTimeout(total=timeout),
+                **request_kwargs(),
+            ) as response:
+                status = response.status
+                if status < 300:
+                    return await _read_json(response)
+
+                if status in RETRY_STATUSES and attempt < MAX_RETRIES:
+                    delay = _retry_delay(response, delay)
+                    await asyncio.sleep(delay)
+                    continue
+
+                if status == 401:
+                    logger.error(
+                        _LOG_API_ERROR,
+                        service,
+                        method,
+                        url,
+                        status,
+                    )
+                    _track_error(service)
+                    raise error_class(_format_error(action, url, 401, "Invalid API key or unauthorized access."))
+
+                if status >= 400:
+                    text = await response.text()
+                    detail = text.strip() if text else str(response.reason)
+                    logger.error(
+                        _LOG_API_ERROR_DETAIL,
+                        service,
+                        method,
+                        url,
+                        status,
+                        detail,
+                    )
+                    _track_error(service)
+                    raise error_class(_format_error(action, url, status, detail))
+
+                # 3xx that wasn't followed; keep the old behaviour of parsing whatever came back
+                return await _read_json(response)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            error = str(e) or type(e).__name__
+            logger.error(_LOG_API_EXCEPTION, service, method, url, error)
+            # full tracebacks of network failures are only worth formatting when debugging
+            logger.debug("event=api_exception_traceback service=%s url=%s", service, url, exc_info=True)
             _track_error(service)
-            raise error_class(_format_error(action, url, status, detail))
-        except requests.RequestException as e:
-            logger.error(
-                "event=api_exception service=%s method=%s url=%s error=%s",
-                service,
-                method,
-                url,
-                str(e),
-                exc_info=True,
-            )
+            raise error_class(_format_error(action, url, None, error))
+        except ValueError as e:
+            # a body that isn't JSON (e.g. an HTML maintenance page); orjson and json both raise ValueError
+            logger.error(_LOG_API_BAD_JSON, service, method, url, status, e)
             _track_error(service)
-            raise error_class(_format_error(action, url, None, str(e)))
+            raise error_class(_format_error(action, url, status, "Response was not valid JSON.")) from e
+
+
+async def _request(
+    method: str,
+    url: str,
+    *,
+    headers: Mapping[str, str],
+    params: dict[str, Any] | None = None,
+    json: dict[str, Any] | None = None,
+    timeout: int = 10,
+    action: str = "Request",
+    service: str = "api",
+    error_class: type[HTTPAPIError] = HTTPAPIError,
+) -> Any:
+    return await _execute(
+        method,
+        url,
+        lambda: {"headers": headers, "params": params, "json": json},
+        timeout=timeout,
+        action=action,
+        service=service,
+        error_class=error_class,
+    )
+
+
+def _build_form(
+    data: dict[str, str] | list[tuple[str, str]],
+    files: list[tuple[str, tuple[str, bytes, str]]] | None,
+) -> aiohttp.FormData:
+    form = aiohttp.FormData()
+    for name, value in (data.items() if isinstance(data, dict) else data):
+        form.add_field(name, value)
+    for name, (filename, content, content_type) in files or []:
+        form.add_field(name, content, filename=filename, content_type=content_type)
+    return form
 
 
-def _request_multipart(
+async def _request_multipart(
     method: str,
     url: str,
     *,
-    headers: dict[str, str],
+    headers: Mapping[str, str],
     data: dict[str, str] | list[tuple[str, str]],
     files: list[tuple[str, tuple[str, bytes, str]]] | None = None,
     timeout: int = 10,
@@ -131,59 +235,13 @@ def _request_multipart(
     service: str = "api",
     error_class: type[HTTPAPIError] = HTTPAPIError,
 ) -> Any:
-    max_retries = 2
-    backoffs = [0.5, 1.0]
-
-    for attempt in range(max_retries + 1):
-        try:
-            _track_call(service)
-            response = _SESSION.request(
-                method,
-                url,
-                headers=headers,
-                data=data,
-                files=files,
-                timeout=timeout,
-            )
-
-            if response.status_code in (502, 503, 504) and attempt < max_retries:
-                time.sleep(backoffs[attempt])
-                continue
-
-            if response.status_code == 401:
-                logger.error(
-                    "event=api_error service=%s method=%s url=%s status=%s",
-                    service,
-                    method,
-                    url,
-                    response.status_code,
-                )
-                _track_error(service)
-                raise error_class(_format_error(action, url, 401, "Invalid API key or unauthorized access."))
-
-            response.raise_for_status()
-            return response.json()
-        except requests.HTTPError as e:
-            status = e.response.status_code if e.response else None
-            detail = e.response.text.strip() if e.response and e.response.text else str(e)
-            logger.error(
-                "event=api_error service=%s method=%s url=%s status=%s detail=%s",
-                service,
-                method,
-                url,
-                status,
-                detail,
-            )
-            _track_error(service)
-            raise error_class(_format_error(action, url, status, detail))
-        except requests.RequestException as e:
-            logger.error(
-                "event=api_exception service=%s method=%s url=%s error=%s",
-                service,
-                method,
-                url,
-                str(e),
-                exc_info=True,
-            )
-            _track_error(service)
-            raise error_class(_format_error(action, url, None, str(e)))
+    # FormData can only be serialized once, so rebuild it for every attempt
+    return await _execute(
+        method,
+        url,
+        lambda: {"headers": headers, "data": _build_form(data, files)},
+        timeout=timeout,
+        action=action,
+        service=service,
+        error_class=error_class,
+    )
@@ -7,101 +7,196 @@ The bot operator cannot read actual API keys.
 Hacky at best, but it works.
 """
 
+import atexit
 import sqlite3
 from pathlib import Path
 import threading
 
+from bot.cache import TTLCache
 from bot.errors import StorageError
 
 DATA_DIR = Path(__file__).parent.parent / "data"
 DB_PATH = DATA_DIR / "keys.db"
 
-_db_initialized = False
-_db_init_lock = threading.Lock()
+# preferences only change through upsert_user_preferences, which refreshes this
+_PREFS_CACHE = TTLCache(1024, 600)
+_prefs_lock = threading.Lock()
+_MISSING = object()
+
+# Keys are only ever looked up by (discord_id, service), so the table is
+# clustered on that primary key instead of carrying a separate rowid B-tree.
+_SQL_CREATE_USER_KEYS = """
+    CREATE TABLE IF NOT EXISTS user_keys (
+        discord_id INTEGER,
+        service TEXT NOT NULL,
+        encrypted_key TEXT NOT NULL,
+        salt TEXT NOT NULL,
+        metadata TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (discord_id, service)
+    ) WITHOUT ROWID
+"""
+
+# Hot-path statements, kept as constants so every call hands sqlite3 the same
+# string and hits its per-connection prepared statement cache.
+STATEMENT_CACHE_SIZE = 256
+SQL_BATCH_SIZE = 900
+# per-connection page cache (negative = KiB) and memory-mapped I/O window
+DB_CACHE_SIZE_KIB = 64000
+DB_MMAP_SIZE = 256 * 1024 * 1024
+_SQL_UPSERT_KEY = """
+    INSERT INTO user_keys (discord_id, service, encrypted_key, salt, metadata, updated_at)
+    VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT(discord_id, service) DO UPDATE SET
+        encrypted_key = excluded.encrypted_key,
+        salt = excluded.salt,
+        metadata = excluded.metadata,
+        updated_at = CURRENT_TIMESTAMP
+"""
+_SQL_SELECT_KEY = "SELECT encrypted_key, salt, metadata FROM user_keys WHERE discord_id = ? AND service = ?"
+_SQL_KEY_EXISTS = "SELECT EXISTS(SELECT 1 FROM user_keys WHERE discord_id = ? AND service = ? LIMIT 1)"
+_SQL_DELETE_KEY = "DELETE FROM user_keys WHERE discord_id = ? AND service = ?"
+_SQL_DELETE_USER_KEYS = "DELETE FROM user_keys WHERE discord_id = ?"
+_SQL_SELECT_PREFS = "SELECT discord_id, timezone, public_output, default_service FROM user_preferences WHERE discord_id = ?"
+_SQL_UPSERT_PREFS = """
+    INSERT INTO user_preferences (discord_id, timezone, public_output, default_service, updated_at)
+    VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT(discord_id) DO UPDATE SET
+        timezone = excluded.timezone,
+        public_output = excluded.public_output,
+        default_service = excluded.default_service,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+# one connection per thread (the event loop plus to_thread workers), kept open between calls
+_local = threading.local()
+_connections: set[sqlite3.Connection] = set()
+_connections_lock = threading.Lock()
+
+def _is_file_db() -> bool:
+    return str(DB_PATH) != ":memory:"
+
 
 def _get_connection() -> sqlite3.Connection:
-    """Get a database connection, creating the database and tables if needed."""
-    global _db_initialized
+    """Get this thread's database connection; the schema is set up by _init at import."""
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.path != DB_PATH:
+        if conn is not None:
+            with _connections_lock:
+                _connections.discard(conn)
+            conn.close()
+        # each connection is only used by its own thread; check_same_thread is off so
+        # _close_connections can close them all at exit
+        conn = sqlite3.connect(DB_PATH, cached_statements=STATEMENT_CACHE_SIZE, check_same_thread=False)
+        if _is_file_db():
+            # per-connection settings; journal_mode is persistent and set once at init
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            conn.execute(f"PRAGMA cache_size=-{DB_CACHE_SIZE_KIB}")
+            conn.execute(f"PRAGMA mmap_size={DB_MMAP_SIZE}")
+        _local.conn = conn
+        _local.path = DB_PATH
+        with _connections_lock:
+            _connections.add(conn)
+
+    return conn
+
+
+@atexit.register
+def _close_connections() -> None:
+    """Close every open connection so the WAL is checkpointed on shutdown."""
+    with _connections_lock:
+        for conn in _connections:
+            try:
+                # SQLite recommends optimize right before closing long-lived connections
+                conn.execute("PRAGMA optimize")
+                conn.close()
+            except sqlite3.Error:
+                pass
+        _connections.clear()
+
+
+def _init() -> None:
+    """Create the database and tables and migrate older schemas. Runs once at import."""
     DATA_DIR.mkdir(exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA journal_mode=WAL")
-    conn.execute("PRAGMA synchronous=NORMAL")
-
-    if not _db_initialized:
-        with _db_init_lock:
-            if not _db_initialized:
-                cursor = conn.cursor()
-                
-                # Check if table exists
-                cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='user_keys'")
-                table_exists = cursor.fetchone()
-                
-                if table_exists:
-                    cursor.execute("PRAGMA table_info(user_keys)")
-                    columns = [col['name'] for col in cursor.fetchall()]
-                    
-                    if 'service' not in columns:
-                        cursor.execute("ALTER TABLE user_keys RENAME TO user_keys_v1")
-                        
-                        # Create new table
-                        cursor.execute("""
-                            CREATE TABLE user_keys (
-                                discord_id INTEGER,
-                                service TEXT NOT NULL,
-                                encrypted_key TEXT NOT NULL,
-                                salt TEXT NOT NULL,
-                                metadata TEXT,
-                                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                                PRIMARY KEY (discord_id, service)
-                            )
-                        """)
-                        
-                        cursor.execute("""
-                            INSERT INTO user_keys (discord_id, service, encrypted_key, salt, updated_at)
-                            SELECT discord_id, 'flavortown', encrypted_key, salt, updated_at
-                            FROM user_keys_v1
-                        """)
-                        
-                        cursor.execute("DROP TABLE user_keys_v1")
-                        conn.commit()
-                else:
-                    conn.execute("""
-                        CREATE TABLE IF NOT EXISTS user_keys (
-                            discord_id INTEGER,
-                            service TEXT NOT NULL,
-                            encrypted_key TEXT NOT NULL,
-                            salt TEXT NOT NULL,
-                            metadata TEXT,
-                            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                            PRIMARY KEY (discord_id, service)
-                        )
-                    """)
-                    conn.commit()
-
-                conn.execute("""
-                    CREATE TABLE IF NOT EXISTS user_preferences (
-                        discord_id INTEGER PRIMARY KEY,
-                        timezone TEXT,
-                        public_output INTEGER DEFAULT 0,
-                        default_service TEXT,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
+    conn = _get_connection()
+    if _is_file_db():
+        conn.execute("PRAGMA journal_mode=WAL")
+
+    cursor = conn.cursor()
+
+    # Check if table exists
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name='user_keys'")
+    table_exists = cursor.fetchone()
+
+    if table_exists:
+        cursor.execute("PRAGMA table_info(user_keys)")
+        columns = {col[1] for col in cursor.fetchall()}  # column 1 is the name
+
+        if 'service' not in columns:
+            # rename, copy and drop as one transaction (and one fsync)
+            with conn:
+                cursor.execute("BEGIN IMMEDIATE")
+                cursor.execute("ALTER TABLE user_keys RENAME TO user_keys_v1")
+
+                # Create new table
+                cursor.execute(_SQL_CREATE_USER_KEYS)
+
+                cursor.execute("""
+                    INSERT INTO user_keys (discord_id, service, encrypted_key, salt, updated_at)
+                    SELECT discord_id, 'flavortown', encrypted_key, salt, updated_at
+                    FROM user_keys_v1
                 """)
-                conn.commit()
-                    
-                _db_initialized = True
-    
-    return conn
+
+                cursor.execute("DROP TABLE user_keys_v1")
+        elif "WITHOUT ROWID" not in table_exists[0].upper():
+            # tables created before user_keys was clustered on its primary key
+            with conn:
+                cursor.execute("BEGIN IMMEDIATE")
+                cursor.execute("ALTER TABLE user_keys RENAME TO user_keys_rowid")
+                cursor.execute(_SQL_CREATE_USER_KEYS)
+                cursor.execute("""
+                    INSERT INTO user_keys
+                        (discord_id, service, encrypted_key, salt, metadata, created_at, updated_at)
+                    SELECT discord_id, service, encrypted_key, salt, metadata, created_at, updated_at
+                    FROM user_keys_rowid
+                """)
+                cursor.execute("DROP TABLE user_keys_rowid")
+    else:
+        conn.execute(_SQL_CREATE_USER_KEYS)
+        conn.commit()
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS user_preferences (
+            discord_id INTEGER PRIMARY KEY,
+            timezone TEXT,
+            public_output INTEGER DEFAULT 0,
+            default_service TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.commit()
+
+
+def optimize_db() -> None:
+    """Let SQLite refresh planner statistics for tables that changed since the last run."""
+    conn = _get_connection()
+    try:
+        conn.execute("PRAGMA optimize")
+    except sqlite3.Error as e:
+        raise StorageError("Failed to optimize the database.") from e
 
 
-def init_db() -> None:
-    """Initialize the database schema."""
+def quick_check() -> str:
+    """Run SQLite's integrity check, stopping at the first problem; "ok" when healthy."""
     conn = _get_connection()
-    conn.close()
+    try:
+        row = conn.execute("PRAGMA quick_check(1)").fetchone()
+    except sqlite3.Error as e:
+        raise StorageError("Failed to check the database.") from e
+    return row[0] if row else "unknown"
 
 
 def store_encrypted_key(discord_id: int, service: str, encrypted_key: str, salt: str, metadata: str | None = None) -> None:
@@ -117,21 +212,26 @@ def store_encrypted_key(discord_id: int, service: str, encrypted_key: str, salt:
     """
     conn = _get_connection()
     try:
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO user_keys (discord_id, service, encrypted_key, salt, metadata, updated_at)
-            VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-            ON CONFLICT(discord_id, service) DO UPDATE SET
-                encrypted_key = excluded.encrypted_key,
-                salt = excluded.salt,
-                metadata = excluded.metadata,
-                updated_at = CURRENT_TIMESTAMP
-        """, (discord_id, service, encrypted_key, salt, metadata))
+        conn.execute(_SQL_UPSERT_KEY, (discord_id, service, encrypted_key, salt, metadata))
         conn.commit()
     except sqlite3.Error as e:
+        conn.rollback()
         raise StorageError("Failed to store API key. Please try again.") from e
-    finally:
-        conn.close()
+
+
+def store_many(rows: list[tuple[int, str, str, str, str | None]]) -> None:
+    """
+    Store several encrypted keys in one transaction.
+    
+    Args:
+        rows: (discord_id, service, encrypted_key, salt, metadata) tuples
+    """
+    conn = _get_connection()
+    try:
+        with conn:
+            conn.executemany(_SQL_UPSERT_KEY, rows)
+    except sqlite3.Error as e:
+        raise StorageError("Failed to store API keys. Please try again.") from e
 
 
 def get_encrypted_key(discord_id: int, service: str = "flavortown") -> tuple[str, str, str | None] | None:
@@ -143,20 +243,38 @@ def get_encrypted_key(discord_id: int, service: str = "flavortown") -> tuple[str
     """
     conn = _get_connection()
     try:
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT encrypted_key, salt, metadata FROM user_keys WHERE discord_id = ? AND service = ?",
-            (discord_id, service)
-        )
-        row = cursor.fetchone()
+        row = conn.execute(_SQL_SELECT_KEY, (discord_id, service)).fetchone()
     except sqlite3.Error as e:
         raise StorageError("Failed to read API key. Please try again.") from e
-    finally:
-        conn.close()
     
-    if row:
-        return row["encrypted_key"], row["salt"], row["metadata"]
-    return None
+    return row
+
+
+def get_encrypted_keys_batch(discord_ids: list[int], service: str = "flavortown") -> dict[int, tuple[str, str, str | None]]:
+    """
+    Retrieve encrypted keys for several users of one service in as few queries as possible.
+    
+    Returns:
+        dict mapping discord_id to (encrypted_key, salt, metadata); users without a key are left out.
+    """
+    ids = list(dict.fromkeys(discord_ids))
+    conn = _get_connection()
+    result = {}
+    try:
+        # stay under SQLite's default limit of 999 bound parameters per statement
+        for start in range(0, len(ids), SQL_BATCH_SIZE):
+            chunk = ids[start:start + SQL_BATCH_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            cursor = conn.execute(
+                "SELECT discord_id, encrypted_key, salt, metadata FROM user_keys "
+                f"WHERE service = ? AND discord_id IN ({placeholders})",
+                (service, *chunk),
+            )
+            for discord_id, encrypted_key, salt, metadata in cursor:
+                result[discord_id] = (encrypted_key, salt, metadata)
+    except sqlite3.Error as e:
+        raise StorageError("Failed to read API keys. Please try again.") from e
+    return result
 
 
 def delete_user_key(discord_id: int, service: str | None = None) -> bool:
@@ -172,60 +290,51 @@ def delete_user_key(discord_id: int, service: str | None = None) -> bool:
     """
     conn = _get_connection()
     try:
-        cursor = conn.cursor()
-        
         if service:
-            cursor.execute("DELETE FROM user_keys WHERE discord_id = ? AND service = ?", (discord_id, service))
+            cursor = conn.execute(_SQL_DELETE_KEY, (discord_id, service))
         else:
-            cursor.execute("DELETE FROM user_keys WHERE discord_id = ?", (discord_id,))
-            
+            cursor = conn.execute(_SQL_DELETE_USER_KEYS, (discord_id,))
+
         deleted = cursor.rowcount > 0
         conn.commit()
         return deleted
     except sqlite3.Error as e:
+        conn.rollback()
         raise StorageError("Failed to delete API key. Please try again.") from e
-    finally:
-        conn.close()
 
 
 def user_has_key(discord_id: int, service: str = "flavortown") -> bool:
     """Check if a user has a stored (encrypted) API key for the given service."""
     conn = _get_connection()
     try:
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT 1 FROM user_keys WHERE discord_id = ? AND service = ?",
-            (discord_id, service)
-        )
-        exists = cursor.fetchone() is not None
-        return exists
+        return bool(conn.execute(_SQL_KEY_EXISTS, (discord_id, service)).fetchone()[0])
     except sqlite3.Error as e:
         raise StorageError("Failed to read API key. Please try again.") from e
-    finally:
-        conn.close()
 
 def get_user_preferences(discord_id: int) -> dict | None:
     """Get user preferences for a Discord user."""
+    with _prefs_lock:
+        cached = _PREFS_CACHE.get(discord_id, _MISSING)
+    if cached is not _MISSING:
+        return dict(cached) if cached is not None else None
+
     conn = _get_connection()
     try:
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT discord_id, timezone, public_output, default_service FROM user_preferences WHERE discord_id = ?",
-            (discord_id,)
-        )
-        row = cursor.fetchone()
+        row = conn.execute(_SQL_SELECT_PREFS, (discord_id,)).fetchone()
+        prefs = None
         if row:
-            return {
-                "discord_id": row["discord_id"],
-                "timezone": row["timezone"],
-                "public_output": bool(row["public_output"]) if row["public_output"] is not None else None,
-                "default_service": row["default_service"],
+            row_id, timezone, public_output, default_service = row
+            prefs = {
+                "discord_id": row_id,
+                "timezone": timezone,
+                "public_output": bool(public_output) if public_output is not None else None,
+                "default_service": default_service,
             }
-        return None
+        with _prefs_lock:
+            _PREFS_CACHE.set(discord_id, prefs)
+        return dict(prefs) if prefs is not None else None
     except sqlite3.Error as e:
         raise StorageError("Failed to read preferences. Please try again.") from e
-    finally:
-        conn.close()
 
 
 def upsert_user_preferences(
@@ -237,17 +346,8 @@ def upsert_user_preferences(
     """Insert or update user preferences."""
     conn = _get_connection()
     try:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            INSERT INTO user_preferences (discord_id, timezone, public_output, default_service, updated_at)
-            VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
-            ON CONFLICT(discord_id) DO UPDATE SET
-                timezone = excluded.timezone,
-                public_output = excluded.public_output,
-                default_service = excluded.default_service,
-                updated_at = CURRENT_TIMESTAMP
-            """,
+        conn.execute(
+            _SQL_UPSERT_PREFS,
             (
                 discord_id,
                 timezone,
@@ -257,9 +357,16 @@ def upsert_user_preferences(
         )
         conn.commit()
     except sqlite3.Error as e:
+        conn.rollback()
         raise StorageError("Failed to save preferences. Please try again.") from e
-    finally:
-        conn.close()
+
+    with _prefs_lock:
+        _PREFS_CACHE.set(discord_id, {
+            "discord_id": discord_id,
+            "timezone": timezone,
+            "public_output": public_output,
+            "default_service": default_service,
+        })
 
 
-init_db()
+_init()
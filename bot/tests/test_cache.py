@@ -0,0 +1,74 @@
+import asyncio
+
+import bot.cache as cache
+from bot.cache import TTLCache, coalesce, key_fingerprint
+
+def test_get_set_and_expiry(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+
+    c = TTLCache(maxsize=4, ttl=10)
+    c.set("a", 1)
+    assert c.get("a") == 1
+
+    now[0] += 10
+    assert c.get("a") is None
+    assert len(c) == 0
+
+def test_lru_eviction():
+    c = TTLCache(maxsize=2, ttl=60)
+    c.set("a", 1)
+    c.set("b", 2)
+    c.get("a")
+    c.set("c", 3)
+
+    assert c.get("a") == 1
+    assert c.get("b") is None
+    assert c.get("c") == 3
+
+def test_discard_if_and_fingerprint():
+    fp = key_fingerprint("secret-key")
+    assert fp != b"secret-key"
+    assert fp == key_fingerprint("secret-key")
+
+    c = TTLCache(maxsize=8, ttl=60)
+    c.set((fp, 1), "mine")
+    c.set((key_fingerprint("other"), 1), "theirs")
+
+    assert c.discard_if(lambda k: k[0] == fp) == 1
+    assert c.get((fp, 1)) is None
+    assert len(c) == 1
+
+def test_coalesce_runs_fetch_once_for_concurrent_callers():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "data"
+
+    async def main():
+        return await asyncio.gather(coalesce("k", fetch), coalesce("k", fetch))
+
+    assert asyncio.run(main()) == ["data", "data"]
+    assert len(calls) == 1
+    assert "k" not in cache._INFLIGHT
+
+def test_coalesce_cancelled_caller_does_not_cancel_shared_fetch():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "data"
+
+    async def main():
+        first = asyncio.ensure_future(coalesce("k", fetch))
+        second = asyncio.ensure_future(coalesce("k", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == "data"
+        assert first.cancelled()
+
+    asyncio.run(main())
+    assert len(calls) == 1
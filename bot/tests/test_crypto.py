@@ -1,3 +1,6 @@
+import base64
+
+import bot.crypto as crypto
 from bot.crypto import encrypt_api_key, decrypt_api_key
 
 def test_encrypt_decrypt_roundtrip():
@@ -16,4 +19,39 @@ def test_decrypt_wrong_password_none():
     encrypted, salt = encrypt_api_key(api_key, "rightpassword")
 
     decrypted = decrypt_api_key(encrypted, salt, "wrongpasswordbruh")
-    assert decrypted is None
\ No newline at end of file
+    assert decrypted is None
+
+def test_derived_key_reused_for_same_password_and_salt(monkeypatch):
+    calls = []
+    derive = crypto._derive_key_scrypt
+    monkeypatch.setattr(crypto, "_derive_key_scrypt", lambda pw, salt: calls.append(salt) or derive(pw, salt))
+    crypto.clear_derived_key_cache()
+
+    encrypted, salt = encrypt_api_key("abc123", "rightpassword")
+    assert decrypt_api_key(encrypted, salt, "rightpassword") == "abc123"
+    assert decrypt_api_key(encrypted, salt, "rightpassword") == "abc123"
+    assert len(calls) == 2  # encrypt + first decrypt
+
+    # wrong guesses pay for every derivation and are never cached
+    assert decrypt_api_key(encrypted, salt, "wrongpasswordbruh") is None
+    assert decrypt_api_key(encrypted, salt, "wrongpasswordbruh") is None
+    assert len(calls) == 4
+
+    crypto.forget_derived_keys(salt)
+    assert decrypt_api_key(encrypted, salt, "rightpassword") == "abc123"
+    assert len(calls) == 5
+
+def test_decrypt_legacy_double_encoded_token():
+    encrypted, salt = encrypt_api_key("abc123", "rightpassword")
+    assert encrypted.startswith("gAAAAA")
+
+    legacy = base64.urlsafe_b64encode(encrypted.encode()).decode()
+    assert decrypt_api_key(legacy, salt, "rightpassword") == "abc123"
+
+def test_decrypt_pbkdf2_key_stored_before_scrypt():
+    salt = b"0123456789abcdef"
+    token = crypto.Fernet(crypto._derive_key("rightpassword", salt)).encrypt(b"abc123").decode()
+    salt_b64 = base64.urlsafe_b64encode(salt).decode()
+
+    assert decrypt_api_key(token, salt_b64, "rightpassword") == "abc123"
+    assert decrypt_api_key(token, salt_b64, "wrongpasswordbruh") is None
@@ -0,0 +1,29 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+
+import bot.http as http
+
+async def _serve_once(handler, call):
+    app = web.Application()
+    app.router.add_get("/", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    try:
+        return await call(f"http://127.0.0.1:{port}/")
+    finally:
+        await http.close_session()
+        await runner.cleanup()
+
+def test_non_json_success_body_raises_error_class():
+    async def handler(request):
+        return web.Response(text="<html>down for maintenance</html>", content_type="text/html")
+
+    http.reset_http_stats()
+    with pytest.raises(http.HTTPAPIError, match="not valid JSON"):
+        asyncio.run(_serve_once(handler, lambda url: http._request("GET", url, headers={})))
+    assert http.get_http_stats()["error_calls"] == 1
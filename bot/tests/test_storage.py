@@ -6,8 +6,8 @@ def _use_temp_db(tmp_path):
     # temp db for test run
     storage.DATA_DIR = tmp_path
     storage.DB_PATH = tmp_path / "bruh.db"
-    storage._db_initialized = False
-    storage.init_db()
+    storage._PREFS_CACHE.clear()
+    storage._init()
 
 def test_store_get_delete_flow(tmp_path):
     _use_temp_db(tmp_path)
@@ -45,4 +45,49 @@ def test_delete_all(tmp_path):
     deleted = storage.delete_user_key(discord_id)
     assert deleted is True
     assert storage.get_encrypted_key(discord_id, "flavortown") is None
-    assert storage.get_encrypted_key(discord_id, "hackatime") is None
\ No newline at end of file
+    assert storage.get_encrypted_key(discord_id, "hackatime") is None
+
+def test_preferences_cache_follows_upsert(tmp_path):
+    _use_temp_db(tmp_path)
+
+    discord_id = 777
+    assert storage.get_user_preferences(discord_id) is None
+
+    storage.upsert_user_preferences(discord_id, "UTC", True, "hackatime")
+    prefs = storage.get_user_preferences(discord_id)
+    assert prefs == {
+        "discord_id": discord_id,
+        "timezone": "UTC",
+        "public_output": True,
+        "default_service": "hackatime",
+    }
+
+    # callers get a copy, not the cached dict
+    prefs["timezone"] = "Europe/Berlin"
+    assert storage.get_user_preferences(discord_id)["timezone"] == "UTC"
+
+    storage._PREFS_CACHE.clear()
+    assert storage.get_user_preferences(discord_id)["public_output"] is True
+
+def test_get_encrypted_keys_batch(tmp_path):
+    _use_temp_db(tmp_path)
+
+    storage.store_encrypted_key(1, "flavortown", "e1", "s1", None)
+    storage.store_encrypted_key(2, "flavortown", "e2", "s2", '{"a":1}')
+    storage.store_encrypted_key(3, "hackatime", "e3", "s3", None)
+
+    result = storage.get_encrypted_keys_batch([1, 2, 3, 2, 4], "flavortown")
+    assert result == {1: ("e1", "s1", None), 2: ("e2", "s2", '{"a":1}')}
+    assert storage.get_encrypted_keys_batch([], "flavortown") == {}
+
+def test_store_many(tmp_path):
+    _use_temp_db(tmp_path)
+
+    storage.store_many([
+        (7, "flavortown", "e1", "s1", None),
+        (7, "hackatime", "e2", "s2", '{"username":"x"}'),
+        (7, "flavortown", "e3", "s3", None),
+    ])
+
+    assert storage.get_encrypted_key(7, "flavortown") == ("e3", "s3", None)
+    assert storage.get_encrypted_key(7, "hackatime") == ("e2", "s2", '{"username":"x"}')
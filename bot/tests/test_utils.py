@@ -0,0 +1,23 @@
+from bot.utils import calculate_total_pages, format_seconds, iter_chunked
+
+def test_iter_chunked():
+    assert list(iter_chunked([1, 2, 3, 4, 5], 2)) == [[1, 2], [3, 4], [5]]
+    assert list(iter_chunked(range(6), 3)) == [[0, 1, 2], [3, 4, 5]]
+    assert list(iter_chunked((x for x in "abc"), 5)) == [["a", "b", "c"]]
+    assert list(iter_chunked([], 3)) == []
+
+def test_format_seconds():
+    assert format_seconds(0) == "0 secs"
+    assert format_seconds(45) == "45 secs"
+    assert format_seconds(60) == "1 min"
+    assert format_seconds(150) == "2 mins"
+    assert format_seconds(3600) == "1 hr"
+    assert format_seconds(3660) == "1 hr 1 min"
+    assert format_seconds(7380) == "2 hrs 3 mins"
+
+def test_calculate_total_pages():
+    assert calculate_total_pages(0, 10) == 1
+    assert calculate_total_pages(10, 10) == 1
+    assert calculate_total_pages(11, 10) == 2
+    assert calculate_total_pages(30, 10) == 3
+    assert calculate_total_pages(5, 0) == 1
@@ -1,24 +1,38 @@
 from __future__ import annotations
 
+from functools import lru_cache
+from itertools import islice
 from typing import Iterable
 
 import discord
 
 
+_COLOR_RED = discord.Color.red()
+_COLOR_ORANGE = discord.Color.orange()
+
+# duration patterns keyed by (hours, minutes), each capped at 2 to mean "several"
+_DURATION_FORMATS = {
+    (0, 1): "{m} min",
+    (0, 2): "{m} mins",
+    (1, 0): "{h} hr",
+    (1, 1): "{h} hr {m} min",
+    (1, 2): "{h} hr {m} mins",
+    (2, 0): "{h} hrs",
+    (2, 1): "{h} hrs {m} min",
+    (2, 2): "{h} hrs {m} mins",
+}
+
+
+@lru_cache(maxsize=4096)
 def format_seconds(seconds: int) -> str:
     """Format seconds into a human-readable string."""
     if not seconds:
         return "0 secs"
     if seconds < 60:
         return f"{seconds} secs"
-    if seconds < 3600:
-        mins = seconds // 60
-        return f"{mins} min{'s' if mins != 1 else ''}"
-    hours = seconds // 3600
-    mins = (seconds % 3600) // 60
-    if mins > 0:
-        return f"{hours} hr{'s' if hours != 1 else ''} {mins} min{'s' if mins != 1 else ''}"
-    return f"{hours} hr{'s' if hours != 1 else ''}"
+    hours, rem = divmod(seconds, 3600)
+    mins = rem // 60
+    return _DURATION_FORMATS[min(hours, 2), min(mins, 2)].format(h=hours, m=mins)
 
 
 def clamp_page(page: int, total_pages: int) -> int:
@@ -27,30 +41,44 @@ def clamp_page(page: int, total_pages: int) -> int:
 
 
 def calculate_total_pages(total_items: int, per_page: int) -> int:
-    if per_page <= 0:
+    if per_page <= 0 or total_items <= per_page:
         return 1
-    return max(1, (total_items + per_page - 1) // per_page)
+    return -(-total_items // per_page)
 
 
 def build_error_embed(message: str, title: str = "Error") -> discord.Embed:
-    embed = discord.Embed(title=title, description=message, color=discord.Color.red())
+    embed = discord.Embed(title=title, description=message, color=_COLOR_RED)
     return embed
 
 
 def build_info_embed(title: str, description: str, color: discord.Color | None = None) -> discord.Embed:
-    embed = discord.Embed(title=title, description=description, color=color or discord.Color.orange())
+    embed = discord.Embed(title=title, description=description, color=color or _COLOR_ORANGE)
+    return embed
+
+
+def truncate(text: str, limit: int, placeholder: str = "...") -> str:
+    """Cut text to at most limit characters, ending with placeholder when shortened."""
+    if len(text) <= limit:
+        return text
+    return text[:limit - len(placeholder)] + placeholder
+
+
+def add_fields(embed: discord.Embed, fields: Iterable[tuple[str, str]], *, inline: bool = False) -> discord.Embed:
+    """Add (name, value) fields to an embed in order."""
+    add_field = embed.add_field
+    for name, value in fields:
+        add_field(name=name, value=value, inline=inline)
     return embed
 
 
 def iter_chunked(items: Iterable, size: int):
     """Yield items in chunks of size."""
-    chunk = []
-    for item in items:
-        chunk.append(item)
-        if len(chunk) >= size:
-            yield chunk
-            chunk = []
-    if chunk:
+    if isinstance(items, list):
+        for start in range(0, len(items), size):
+            yield items[start:start + size]
+        return
+    it = iter(items)
+    while chunk := list(islice(it, size)):
         yield chunk
 
 def normalize_optional(text: str | None) -> str | None:
@@ -88,8 +116,7 @@ async def send_error(
     title: str = "Error",
     ephemeral: bool = True,
 ) -> None:
-    embed = build_error_embed(message, title=title)
-    if interaction.response.is_done():
-        await interaction.followup.send(embed=embed, ephemeral=ephemeral)
-    else:
-        await interaction.response.send_message(embed=embed, ephemeral=ephemeral)
+    if interaction.is_expired():
+        return  # the token is no longer valid, nothing can be sent
+    send = interaction.followup.send if interaction.response.is_done() else interaction.response.send_message
+    await send(embed=build_error_embed(message, title=title), ephemeral=ephemeral)